@@ -1,4 +1,4 @@
-from flask import Flask, request, render_template, jsonify
+from flask import Flask, request, render_template, jsonify, g, Response
 import sys
 from flask_sqlalchemy import SQLAlchemy
 from dotenv import load_dotenv
@@ -6,15 +6,22 @@ import os
 import pandas as pd
 import random
 from flask_cors import CORS
-
-import psycopg2
-from psycopg2.extras import RealDictCursor
-
-from src.exception import CustomException
-from src.components.prepare_similarity_matrix import Model_Making
-from src.components.prepare_similarity_matrix import ModelMakingCourse
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+from src.exception import CustomException, ClientError
+from src.exception import ProfileNotFoundError, IncompleteProfileError, NoRecommendationsError
+from src.database import fetch_user_data
+from src.components.model_registry import ModelRegistry
+from src.components.profile_features import profile_featurizer, parse_field
+from src.components.result_cache import ranking_cache, page_cache
+from src.components.recommendation_store import RecommendationStore
+from src.components.user_gate import UserGate
 from src.logger import logging
-from src.api_responce import api_response
+from src.metrics import metrics
+from src.admission import admission_control
+from src.singleflight import SingleFlight
+from src.api_responce import api_response, error_response
+from src.utils import lemmatize_text
 # Load environment variables
 load_dotenv()
 
@@ -23,125 +30,160 @@ app = application
 
 # Enable CORS
 CORS(app)
-# Database connection settings
-DATABASE_CONFIG = {
-    'dbname': os.getenv('DB_NAME'),
-    'user': os.getenv('DB_USER'),
-    'password': os.getenv('DB_PASSWORD'),
-    'host': os.getenv('DB_HOST'),
-    'port': os.getenv('DB_PORT'),
-    'sslmode': os.getenv('DB_SSLMODE'),
-}
-
-# Connect to the database
-def connect_to_database():
-    try:
-        logging.info("Attempting to connect to the database.")
-        connection = psycopg2.connect(**DATABASE_CONFIG)
-        logging.info("Database connection successful.")
-        return connection
-    except psycopg2.Error as e:
-        logging.error(f"Error connecting to the database: {e}")
-        raise CustomException(f"Database connection error: {e}", sys)
-
-# Fetch user data by username
-def fetch_user_data(username):
-    connection = None
-    try:
-        logging.info(f"Fetching data for username: {username}")
-        connection = connect_to_database()
-        with connection.cursor(cursor_factory=RealDictCursor) as cursor:
-            # Query to fetch basic user data
-            query1 = "SELECT id, username, email, first_name, last_name FROM auth_user WHERE username = %s"
-            cursor.execute(query1, (username,))
-            user_data1 = cursor.fetchone()
-            logging.info(f"Basic user data fetched: {user_data1}")
-
-            if not user_data1:
-                logging.error(f"No user found for username: {username}")
-                raise CustomException(f"User not found for username: {username}", sys)
-
-            # Query to fetch user profile data
-            query2 = "SELECT * FROM rec_system_userprofiledata WHERE user_id = %s"
-            cursor.execute(query2, (username,))
-            user_data2 = cursor.fetchone()
-            logging.info(f"User profile data fetched: {user_data2}")
-
-            if not user_data2:
-                logging.warning(f"No profile data found for user ID: {username}")
-
-            return user_data1, user_data2
-
-    except CustomException as ce:
-        logging.error(f"Custom exception occurred: {ce}")
-        raise
-
-    except psycopg2.Error as e:
-        logging.error(f"Database query error: {e}")
-        raise CustomException(f"Error fetching user data: {e}", sys)
-
-    except Exception as e:
-        logging.error(f"Unexpected error: {e}")
-        raise CustomException(f"Unexpected error while fetching user data: {e}", sys)
-
-    finally:
-        if connection:
-            connection.close()
-            logging.info("Database connection closed.")
 
-
-# Initialize model once
-model_maker = Model_Making()
-model_maker.model_building()
-
-course_maker = ModelMakingCourse()
-course_maker.model_building_course()
+# Take the client address from X-Forwarded-For only behind this many trusted proxies
+TRUSTED_PROXY_HOPS = int(os.getenv('TRUSTED_PROXY_HOPS', '0'))
+if TRUSTED_PROXY_HOPS:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_HOPS)
+
+# Compile templates once instead of checking them for changes on every render
+app.config['TEMPLATES_AUTO_RELOAD'] = os.getenv('TEMPLATES_AUTO_RELOAD') == '1'
+
+# Concurrent requests for the same user share one DB fetch
+user_fetch_flight = SingleFlight('fetch_user_data')
+
+# Precomputed top-k per user, written by src.components.precompute_recommendations
+recommendation_store = RecommendationStore()
+
+# Initialize model once; rebuilt in the background when the data files change.
+# Loaded before the refresher thread starts so the first shard forks only
+# share the process with the log listener.
+model_registry = ModelRegistry()
+model_registry.load()
+if os.getenv('MODEL_WATCH', '1') == '1':
+    model_registry.start_watcher()
+
+# Rejects unknown and incomplete usernames before they reach Postgres
+user_gate = UserGate()
+if os.getenv('KNOWN_USERS_REFRESH', '60') != '0':
+    user_gate.start_refresher()
+
+@app.before_request
+def acquire_models():
+    g.models = model_registry.acquire()
+
+@app.teardown_request
+def release_models(exc=None):
+    models = g.pop('models', None)
+    if models is not None:
+        model_registry.release(models)
+
+@app.after_request
+def add_model_version(response):
+    models = g.get('models')
+    if models is not None:
+        response.headers['X-Model-Version'] = models.version
+    return response
+
+@app.route('/admin/reload', methods=['POST'])
+def admin_reload():
+    token = os.getenv('ADMIN_TOKEN')
+    if not token or request.headers.get('X-Admin-Token') != token:
+        return api_response(success=False, message="Forbidden", response_code=403, data={})
+    # Reaches the other workers through the reload marker their watchers poll
+    target_version = model_registry.request_reload()
+    return api_response(success=True, message="Model reload started", response_code=202,
+                        data={"current_version": model_registry.version, "target_version": target_version})
+
+@app.errorhandler(CustomException)
+def handle_custom_exception(error):
+    return error_response(error)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype='text/plain')
+
+PROJECT_FORM_FIELDS = ('skills', 'framework', 'tools', 'category', 'domain')
+COURSE_FORM_FIELDS = ('skills', 'domain')
+
+def form_query_text(fields):
+    """
+    Normalize the form inputs into the lemmatized query the caches are keyed on.
+    """
+    return lemmatize_text(' '.join(token for field in fields for token in parse_field(request.form.get(field))))
+
+def form_difficulty():
+    """
+    Normalized comma-separated difficulty filter from the form, or None for any level.
+    """
+    return ','.join(parse_field(request.form.get('difficulty'))) or None
+
+def render_cached(template, query_text, render, difficulty=None):
+    key = (template, query_text, difficulty, g.models.version)
+    html = page_cache.get(key)
+    if html is None:
+        html = render()
+        page_cache.put(key, html)
+    return html
+
+# Empty forms and already rendered results never touch the models
+def is_cached_page(template, fields):
+    def check(*args, **kwargs):
+        if request.method == 'GET':
+            return True
+        return (template, form_query_text(fields), form_difficulty(), g.models.version) in page_cache
+    return check
+
+def precomputed_ranking(username, kind):
+    """
+    Fresh precomputed ranking for the user, looked up at most once per request.
+
+    The entry must match the profile hash the user gate loaded on its last
+    refresh, so edited profiles fall back to live scoring within one refresh.
+    """
+    attr = f'precomputed_{kind}'
+    if attr not in g:
+        setattr(g, attr, recommendation_store.lookup(username, kind, g.models.fingerprint,
+                                                     user_gate.profile_hash(username)))
+    return getattr(g, attr)
+
+# Store hits are served without Postgres, so they are the cheap requests
+def has_precomputed(kind):
+    return lambda username: precomputed_ranking(username, kind) is not None
 
 @app.route('/')
 def index():
     return render_template('home.html')
 
 @app.route('/ml_api/<string:username>')
+@admission_control(cheap_if=has_precomputed('project'))
 def ml_api(username):
     try:
-        logging.info(f"API call for user: {username}")
-
-        # Fetch user data
-        user_data1, user_data2 = fetch_user_data(username)
-        if not user_data1 or not user_data2:
-            logging.error(f"User data not found for username: {username}")
-            raise CustomException(f"User data not found for username: {username}", sys)
-
-        logging.info(f"User data successfully fetched for: {username}")
-
-        # Extract user-specific details
-        interest_field = user_data2.get('interest_field', None)
-        interest_domain = user_data2.get('interest_domain', None)
-        programming_language = user_data2.get('programming_language', None)
-        frameworks = user_data2.get('frameworks', None)
-        cloud_and_database = user_data2.get('cloud_and_database', None)
-        projects = user_data2.get('projects', None)
-        achievements_and_awards = user_data2.get('achievements_and_awards', None)
-        academic_year = user_data2.get('academic_year', None)
-        branch = user_data2.get('branch', None)
-
-        # Validate required fields
-        if not all([interest_field, interest_domain, programming_language, frameworks]):
-            logging.error(f"Incomplete user data for username: {username}")
-            raise CustomException(f"Incomplete user data for username: {username}", sys)
-
-        # Get recommendations
-        logging.info(f"Fetching recommendations for: {username}")
-        projects,descriptions,skills,index = model_maker.recommend_projects(
-            input_skills=programming_language,
-            input_framework=frameworks,
-            input_tools=cloud_and_database,
-            input_category=interest_field,
-            input_domain=interest_domain
-        )
+        logging.info("API call for user: %s", username, extra={'sample': 'ml_api'})
+
+        # Errors from the gate are already cached; remembering them again would extend their TTL
+        try:
+            user_gate.check(username)
+        except ClientError as ce:
+            logging.info("Rejected by user gate: %s", ce, extra={'sample': 'ml_api'})
+            return error_response(ce)
+
+        # A fresh precomputed entry is served without touching Postgres
+        ranked = precomputed_ranking(username, 'project')
+        if ranked is None:
+            # Fetch user data
+            user_data1, user_data2 = user_fetch_flight.do(username, fetch_user_data, username)
+            if not user_data1 or not user_data2:
+                raise ProfileNotFoundError(username)
+
+            logging.info("User data successfully fetched for: %s", username, extra={'sample': 'ml_api'})
+
+            # Parse the profile once and build the query vectors for both models
+            query = profile_featurizer.featurize(user_data2, g.models)
+
+            # Validate required fields
+            if not query.features.is_complete():
+                raise IncompleteProfileError(username)
+
+            # Get recommendations
+            logging.info("Fetching recommendations for: %s", username, extra={'sample': 'ml_api'})
+            ranked = recommendation_store.lookup(username, 'project', g.models.fingerprint, query.features.hash)
+            if ranked is None:
+                ranked = ranking_cache.ranked('project', g.models.project, g.models.version,
+                                              query.features.query_text, query.project_vector)
+        projects,descriptions,skills,index = g.models.project.recommend_from_ranking(ranked)
         if not projects or not descriptions:
-            logging.error("No recommendations found")
-            raise CustomException("No recommendations found", sys)
+            raise NoRecommendationsError()
 
         # Format results
         final_results = {
@@ -153,13 +195,18 @@ def ml_api(username):
         
         final_results = pd.DataFrame(final_results)
         df_json = final_results.to_json(orient="records")
-        logging.info(f"Recommendations successfully generated for: {username}")
+        logging.info("Recommendations successfully generated for: %s", username, extra={'sample': 'ml_api'})
 
         return api_response(success=True, message="Recommendations successfully generated",response_code = 200 ,data=df_json)
 
+    except ClientError as ce:
+        user_gate.remember(username, ce)
+        logging.info("Rejected request: %s", ce, extra={'sample': 'ml_api'})
+        return error_response(ce)
+
     except CustomException as ce:
-        logging.error(f"Custom exception occurred: {ce}")
-        return jsonify({"error": str(ce)}), 400
+        logging.error("Custom exception occurred: %s", ce)
+        return error_response(ce)
 
 
 @app.route('/ml_index/<int:index>')
@@ -190,48 +237,38 @@ def project_details(index):
 
 
 @app.route('/predict_project', methods=['GET','POST'])
+@admission_control(cheap_if=is_cached_page('index.html', PROJECT_FORM_FIELDS))
 def predict_project():
     try:
         if request.method == 'GET':
-            return render_template('index.html')
+            return render_cached('index.html', None, lambda: render_template('index.html'))
         else:
-            # Collect input attributes
-            input_skills = request.form.get('skills', '').split(",") if request.form.get('skills') else []
-            input_framework = request.form.get('framework', '').split(",") if request.form.get('framework') else []
-            input_tools = request.form.get('tools', '').split(",") if request.form.get('tools') else []
-            input_category = request.form.get('category', '').split(",") if request.form.get('category') else []
-            input_domain = request.form.get('domain', '').split(",") if request.form.get('domain') else []
-
-            # Get recommendations
-            projects,descriptions,skills,index = model_maker.recommend_projects(
-                input_skills=input_skills, #programming_language
-                input_framework=input_framework,#frameworks
-                input_tools=input_tools,#cloud_and_database
-                input_category=input_category,#interest_field
-                input_domain=input_domain #interest_domain
-            )
-            # for i, recommendation in enumerate(results, start=1):
-            #     print(f"Recommendation {i}:")Prbhudeb
-            #     print(f"Project Name: {recommendation[0]}")
-            #     print(f"Project Description: {recommendation[1]}")
-            #     print("-" * 40)  # Separator for better readability
-            # return render_template('index.html', project=results[0],description = results[1])
-
-            if projects and descriptions:
-                return render_template('index.html', 
-                                     project=projects[0],
-                                     description=descriptions[0],
-                                     skills=skills[0],
-                                     index=index[0])
-            else:
-                return render_template('index.html', 
-                                     project="No matching projects found",
-                                     description="")
+            # Normalize input attributes into the shared cache key
+            query_text = form_query_text(PROJECT_FORM_FIELDS)
+
+            def render():
+                ranked = ranking_cache.ranked('project', g.models.project, g.models.version, query_text)
+                # The page shows a single project, so only look that one up
+                projects,descriptions,skills,index = g.models.project.recommend_from_ranking(ranked, top_n=1)
+
+                if projects and descriptions:
+                    return render_template('index.html', 
+                                         project=projects[0],
+                                         description=descriptions[0],
+                                         skills=skills[0],
+                                         index=index[0])
+                else:
+                    return render_template('index.html', 
+                                         project="No matching projects found",
+                                         description="")
+
+            return render_cached('index.html', query_text, render)
 
     except Exception as e:
         raise CustomException(e, sys)
     
 @app.route('/course_api', methods=['POST'])
+@admission_control()
 def course():
     try:
         # Fetching the JSON data from the request
@@ -240,11 +277,18 @@ def course():
             return jsonify({"error": "Missing 'skills' in the request"}), 400
         
         skills_str = data['skills']  # Extract skills from the JSON body
-        
+
+        # Reject unknown difficulty levels instead of silently ignoring the filter
+        difficulty = data.get('difficulty')
+        try:
+            g.models.course.difficulty_mask(difficulty)
+        except ClientError as ce:
+            return error_response(ce)
+
         # Here you can replace ModelMakingCourse.recommend_courses with your own logic
-        course, description, url = ModelMakingCourse.recommend_courses(
-            self=course_maker,
+        course, description, url = g.models.course.recommend_courses(
             input_skills=skills_str,
+            input_difficulty=difficulty,
             # input_domain='Computer Science'
         )
         
@@ -347,45 +391,44 @@ def beginners_course():
 
     
 @app.route('/course/<string:username>')
+@admission_control(cheap_if=has_precomputed('course'))
 def course_api(username):
     try:
-        logging.info(f"API call for user: {username}")
-
-        # Fetch user data
-        user_data1, user_data2 = fetch_user_data(username)
-        if not user_data1 or not user_data2:
-            logging.error(f"User data not found for username: {username}")
-            raise CustomException(f"User data not found for username: {username}", sys)
-
-        logging.info(f"User data successfully fetched for: {username}")
-
-        # Extract user-specific details
-        interest_field = user_data2.get('interest_field', None)
-        interest_domain = user_data2.get('interest_domain', None)
-        programming_language = user_data2.get('programming_language', None)
-        frameworks = user_data2.get('frameworks', None)
-        cloud_and_database = user_data2.get('cloud_and_database', None)
-        projects = user_data2.get('projects', None)
-        achievements_and_awards = user_data2.get('achievements_and_awards', None)
-        academic_year = user_data2.get('academic_year', None)
-        branch = user_data2.get('branch', None)
-
-        # Validate required fields
-        if not all([interest_field, interest_domain, programming_language, frameworks]):
-            logging.error(f"Incomplete user data for username: {username}")
-            raise CustomException(f"Incomplete user data for username: {username}", sys)
-
-        # Get recommendations
-        logging.info(f"Fetching recommendations for: {username}")
-        skills = programming_language + ',' + frameworks + ',' + cloud_and_database + ',' + interest_field
-        course,course_description,url = ModelMakingCourse.recommend_courses(
-            self=course_maker,
-            input_skills=skills,
-            input_domain=interest_domain
-        )
+        logging.info("API call for user: %s", username, extra={'sample': 'course_api'})
+
+        # Errors from the gate are already cached; remembering them again would extend their TTL
+        try:
+            user_gate.check(username)
+        except ClientError as ce:
+            logging.info("Rejected by user gate: %s", ce, extra={'sample': 'course_api'})
+            return error_response(ce)
+
+        # A fresh precomputed entry is served without touching Postgres
+        ranked = precomputed_ranking(username, 'course')
+        if ranked is None:
+            # Fetch user data
+            user_data1, user_data2 = user_fetch_flight.do(username, fetch_user_data, username)
+            if not user_data1 or not user_data2:
+                raise ProfileNotFoundError(username)
+
+            logging.info("User data successfully fetched for: %s", username, extra={'sample': 'course_api'})
+
+            # Parse the profile once and build the query vectors for both models
+            query = profile_featurizer.featurize(user_data2, g.models)
+
+            # Validate required fields
+            if not query.features.is_complete():
+                raise IncompleteProfileError(username)
+
+            # Get recommendations
+            logging.info("Fetching recommendations for: %s", username, extra={'sample': 'course_api'})
+            ranked = recommendation_store.lookup(username, 'course', g.models.fingerprint, query.features.hash)
+            if ranked is None:
+                ranked = ranking_cache.ranked('course', g.models.course, g.models.version,
+                                              query.features.query_text, query.course_vector)
+        course,course_description,url = g.models.course.recommend_from_ranking(ranked)
         if not course or not course_description:
-            logging.error("No recommendations found")
-            raise CustomException("No recommendations found", sys)
+            raise NoRecommendationsError()
 
         # Format results
         final_results = {
@@ -396,42 +439,54 @@ def course_api(username):
         
         final_results = pd.DataFrame(final_results)
         df_json = final_results.to_json(orient="records")
-        logging.info(f"Recommendations successfully generated for: {username}")
+        logging.info("Recommendations successfully generated for: %s", username, extra={'sample': 'course_api'})
 
         return api_response(success=True, message="Recommendations successfully generated",response_code = 200 ,data=df_json)
 
+    except ClientError as ce:
+        user_gate.remember(username, ce)
+        logging.info("Rejected request: %s", ce, extra={'sample': 'course_api'})
+        return error_response(ce)
+
     except CustomException as ce:
-        logging.error(f"Custom exception occurred: {ce}")
-        return jsonify({"error": str(ce)}), 400
+        logging.error("Custom exception occurred: %s", ce)
+        return error_response(ce)
     
 @app.route('/predict_course', methods=['GET','POST'])
+@admission_control(cheap_if=is_cached_page('html_course.html', COURSE_FORM_FIELDS))
 def predict_course():
     try:
         if request.method == 'GET':
-            return render_template('html_course.html')
+            return render_cached('html_course.html', None, lambda: render_template('html_course.html'))
         else:
-            # Collect input attributes
-            input_skills = request.form.get('skills', '').split(",") if request.form.get('skills') else []
-            input_domain = request.form.get('domain', '').split(",") if request.form.get('domain') else []
-
-            # Get recommendations
-            course,course_descriptions,url = course_maker.recommend_courses(
-                input_skills=input_skills, #programming_language
-                input_domain=input_domain #interest_domain
-            )
-
-            # print(course,course_descriptions,url)
-
-            if course and course_descriptions:
-                return render_template('html_course.html', 
-                                     course=course[0],
-                                     course_description=course_descriptions[0],
-                                     url=url[0]
-                )
-            else:
-                return render_template('html_course.html', 
-                                     course="No matching course found",
-                                     course_description="")
+            # Normalize input attributes into the shared cache key
+            query_text = form_query_text(COURSE_FORM_FIELDS)
+            difficulty = form_difficulty()
+            try:
+                g.models.course.difficulty_mask(difficulty)
+            except ClientError as ce:
+                return render_template('html_course.html', course=str(ce), course_description=""), ce.status_code
+
+            def render():
+                course, course_descriptions, url = [], [], []
+                if query_text:
+                    ranked = ranking_cache.ranked('course', g.models.course, g.models.version, query_text,
+                                                  difficulty=difficulty)
+                    # The page shows a single course, so only look that one up
+                    course,course_descriptions,url = g.models.course.recommend_from_ranking(ranked, top_n=1)
+
+                if course and course_descriptions:
+                    return render_template('html_course.html', 
+                                         course=course[0],
+                                         course_description=course_descriptions[0],
+                                         url=url[0]
+                    )
+                else:
+                    return render_template('html_course.html', 
+                                         course="No matching course found",
+                                         course_description="")
+
+            return render_cached('html_course.html', query_text, render, difficulty=difficulty)
 
     except Exception as e:
         raise CustomException(e, sys)
@@ -0,0 +1,76 @@
+"""
+Check that unknown usernames cost no more than known ones on /ml_api.
+
+Drives the real app through the test client with fetch_user_data stubbed, so
+the DB is out of the picture: once for a known user with a complete profile
+and once for unknown usernames, which raise UserNotFoundError from the fetch.
+Each request uses a new username so neither path is served from the user
+gate's negative cache or a precomputed entry.
+
+    python -m benchmarks.bench_errors --requests 2000
+"""
+import os
+import time
+import argparse
+
+# Keep the benchmark off the DB and the file watcher; set before app is imported
+os.environ.setdefault('KNOWN_USERS_REFRESH', '0')
+os.environ.setdefault('MODEL_WATCH', '0')
+
+import app as app_module
+from src.exception import UserNotFoundError
+
+PROFILE = {
+    'interest_field': 'Web Development',
+    'interest_domain': 'Software',
+    'programming_language': 'Python, JavaScript',
+    'frameworks': 'Flask, React',
+    'cloud_and_database': 'PostgreSQL',
+    'projects': 'Portfolio site',
+    'achievements_and_awards': '',
+    'academic_year': '3',
+    'branch': 'CSE',
+}
+
+
+def known_user(username):
+    return {'id': 1, 'username': username}, dict(PROFILE, user_id=username)
+
+
+def unknown_user(username):
+    raise UserNotFoundError(username)
+
+
+def run(client, fetch, label, requests):
+    app_module.fetch_user_data = fetch
+    status = client.get(f'/ml_api/{label}-warmup').status_code
+    started = time.perf_counter()
+    for i in range(requests):
+        client.get(f'/ml_api/{label}{i}')
+    elapsed = time.perf_counter() - started
+    return status, elapsed / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    client = app_module.app.test_client()
+    original = app_module.fetch_user_data
+    try:
+        results = [
+            ('known', *run(client, known_user, 'known', args.requests)),
+            ('unknown', *run(client, unknown_user, 'unknown', args.requests)),
+        ]
+    finally:
+        app_module.fetch_user_data = original
+
+    known_us = results[0][2]
+    print(f"{'user':<10}{'status':>8}{'us/req':>10}{'vs known':>10}")
+    for label, status, per_request in results:
+        print(f"{label:<10}{status:>8}{per_request:>10.1f}{per_request / known_us:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Load test the /predict_project and /predict_course form routes.
+
+By default the app is driven in-process through the Flask test client, once
+with the result caches cleared before every request (cold) and once with
+them left warm. Pass --url to hit a running server with concurrent workers.
+
+    python -m benchmarks.bench_html_routes --requests 2000
+    python -m benchmarks.bench_html_routes --url http://localhost:5000 --workers 16
+"""
+import time
+import random
+import argparse
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+FORMS = {
+    '/predict_project': [
+        {'skills': 'Python, JavaScript', 'framework': 'Flask, React', 'domain': 'Healthcare'},
+        {'skills': 'Java', 'framework': 'Spring', 'tools': 'MySQL', 'category': 'Web Development'},
+        {'skills': 'Python', 'framework': 'TensorFlow', 'category': 'Machine Learning', 'domain': 'Finance'},
+        {'skills': 'Kotlin', 'framework': 'Android', 'tools': 'Firebase', 'domain': 'Education'},
+    ],
+    '/predict_course': [
+        {'skills': 'python, data analysis', 'domain': 'machine learning'},
+        {'skills': 'javascript, react', 'domain': 'web development'},
+        {'skills': 'sql', 'domain': 'databases'},
+        {'skills': 'statistics', 'domain': 'data science'},
+    ],
+}
+
+
+def run_in_process(requests):
+    import app
+    from src.admission import rate_limiter
+    from src.components.result_cache import ranking_cache, page_cache
+
+    # The load comes from one client, so lift its rate limit
+    rate_limiter.rate = rate_limiter.burst = float('inf')
+    client = app.app.test_client()
+    for route, forms in FORMS.items():
+        for mode in ('cold', 'warm'):
+            started = time.perf_counter()
+            for i in range(requests):
+                if mode == 'cold':
+                    page_cache._entries.clear()
+                    ranking_cache._cache._entries.clear()
+                response = client.post(route, data=forms[i % len(forms)])
+                assert response.status_code == 200, response.status_code
+            elapsed = time.perf_counter() - started
+            print(f"{route:<18}{mode:<6}{elapsed / requests * 1e3:>10.2f} ms/req{requests / elapsed:>10.0f} req/s")
+
+
+def run_http(url, requests, workers):
+    def post(args):
+        route, form = args
+        data = urllib.parse.urlencode(form).encode()
+        with urllib.request.urlopen(url.rstrip('/') + route, data=data) as response:
+            response.read()
+            return response.status
+
+    for route, forms in FORMS.items():
+        jobs = [(route, random.choice(forms)) for _ in range(requests)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            statuses = list(pool.map(post, jobs))
+        elapsed = time.perf_counter() - started
+        ok = sum(status == 200 for status in statuses)
+        print(f"{route:<18}{requests / elapsed:>10.0f} req/s  {ok}/{requests} ok")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--url')
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    if args.url:
+        run_http(args.url, args.requests, args.workers)
+    else:
+        run_in_process(args.requests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Measure the request-path cost of logging.
+
+Compares the old synchronous file logging with f-string messages against the
+queued JSON handler from src.logger, writing the same two INFO records per
+request. Separate rows show per-route sampling and the profile dump demoted
+to DEBUG, as the request path now logs it.
+
+    python -m benchmarks.bench_logging --records 50000
+"""
+import os
+import time
+import logging
+import argparse
+import tempfile
+
+from src.logger import create_async_handler, SamplingFilter
+
+PROFILE_ROW = {
+    'user_id': 'student42', 'interest_field': 'Web Development', 'interest_domain': 'Healthcare',
+    'programming_language': 'Python, JavaScript', 'frameworks': 'Flask, React',
+    'cloud_and_database': 'PostgreSQL, AWS', 'projects': 'Chat app, Portfolio', 'academic_year': '3',
+}
+
+
+def make_logger(name, handler):
+    logger = logging.getLogger(name)
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def run_sync(path, records):
+    handler = logging.FileHandler(path)
+    handler.setFormatter(logging.Formatter("[ %(asctime)s ] %(lineno)d %(name)s - %(levelname)s - %(message)s"))
+    logger = make_logger('bench.sync', handler)
+    started = time.perf_counter()
+    for i in range(records):
+        logger.info(f"API call for user: student{i}")
+        logger.info(f"User profile data fetched: {PROFILE_ROW}")
+    elapsed = time.perf_counter() - started
+    handler.close()
+    return elapsed, elapsed
+
+
+def run_async(path, records, sample_rate=1, profile_level=logging.INFO):
+    queue_handler, listener = create_async_handler(path)
+    queue_handler.filters = [SamplingFilter(default_rate=sample_rate, rates={})]
+    logger = make_logger(f'bench.async{sample_rate}.{profile_level}', queue_handler)
+    listener.start()
+    started = time.perf_counter()
+    for i in range(records):
+        logger.info("API call for user: %s", f"student{i}", extra={'sample': 'ml_api'})
+        logger.log(profile_level, "User profile data fetched: %s", PROFILE_ROW, extra={'sample': 'ml_api'})
+    caller = time.perf_counter() - started
+    listener.stop()
+    return caller, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--records', type=int, default=50000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        runs = [
+            ('sync file, f-strings', lambda: run_sync(os.path.join(tmp, 'sync.log'), args.records)),
+            ('async json', lambda: run_async(os.path.join(tmp, 'async.log'), args.records)),
+            ('async json, 1/10 sampled', lambda: run_async(os.path.join(tmp, 'sampled.log'), args.records, 10)),
+            ('async json, profile DEBUG', lambda: run_async(os.path.join(tmp, 'debug.log'), args.records,
+                                                             profile_level=logging.DEBUG)),
+        ]
+        print(f"{'mode':<28}{'caller us/req':>15}{'req/s':>12}{'drained s':>12}")
+        for name, run in runs:
+            caller, total = run()
+            print(f"{name:<28}{caller / args.records * 1e6:>15.2f}{args.records / caller:>12.0f}{total:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Compare single-process and sharded project scoring on a synthetic catalog.
+
+Builds a random sparse catalog much larger than the real one, ranks the same
+queries with one in-process scorer and with ShardedIndex in both modes, and
+reports the latency per batch and whether the sharded top-k scores match.
+Synthetic counts produce many tied scores, so ids may differ within a tie.
+
+    python -m benchmarks.bench_sharding --documents 400000 --shards 2 4
+    python -m benchmarks.bench_sharding --latency-ms 2
+"""
+import time
+import argparse
+
+import numpy as np
+from scipy import sparse
+
+from src.components.document_vectors import build_document_vectors, top_k_similar
+from src.components.sharded_index import ShardedIndex
+
+TOP_K = 26
+
+
+def synthetic_catalog(documents, features, density, seed=0):
+    rng = np.random.default_rng(seed)
+    counts = sparse.random(documents, features, density=density, format='csr', random_state=rng)
+    counts.data = np.ceil(counts.data * 3)
+    return counts
+
+
+def synthetic_queries(count, features, words, seed=1):
+    rng = np.random.default_rng(seed)
+    queries = np.zeros((count, features))
+    for row in queries:
+        row[rng.choice(features, size=words, replace=False)] = 1
+    return queries
+
+
+def timed(rank, queries, batch, repeat):
+    # Warm up once, then report the best of `repeat` passes
+    rank(queries[:batch])
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        results = [rank(queries[i:i + batch]) for i in range(0, len(queries), batch)]
+        best = min(best, time.perf_counter() - started)
+    scores = np.vstack([result[1] for result in results])
+    return best / (len(queries) / batch) * 1e3, scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--documents', type=int, default=400000)
+    parser.add_argument('--features', type=int, default=1100)
+    parser.add_argument('--density', type=float, default=0.01)
+    parser.add_argument('--queries', type=int, default=64)
+    parser.add_argument('--batch', type=int, default=8)
+    parser.add_argument('--shards', type=int, nargs='+', default=[2, 4])
+    parser.add_argument('--storage', default='float32')
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    vectors = build_document_vectors(
+        synthetic_catalog(args.documents, args.features, args.density), storage=args.storage
+    )
+    queries = synthetic_queries(args.queries, args.features, words=8)
+    print(f"{args.documents} documents, {vectors.nbytes / 1e6:.1f} MB, batches of {args.batch}")
+    print(f"{'mode':<18}{'shards':>8}{'ms/batch':>12}{'speedup':>10}{'same top-k':>12}")
+
+    baseline, reference = timed(lambda q: top_k_similar(vectors.scores(q), TOP_K), queries, args.batch, args.repeat)
+    print(f"{'single':<18}{1:>8}{baseline:>12.2f}{1.0:>10.2f}{'-':>12}")
+
+    for mode in ('process', 'simulated-remote'):
+        for shards in args.shards:
+            index = ShardedIndex(vectors, shards, mode=mode, latency=args.latency_ms / 1000)
+            try:
+                elapsed, scores = timed(lambda q: index.top_k(q, TOP_K), queries, args.batch, args.repeat)
+            finally:
+                index.close()
+            same = np.mean(np.all(np.isclose(scores, reference), axis=1))
+            print(f"{mode:<18}{shards:>8}{elapsed:>12.2f}{baseline / elapsed:>10.2f}{same:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Compare float64, float32 and int8 document vector storage.
+
+Builds both recommenders once per storage format and reports the vector
+memory, the per-query ranking latency and how closely the top-10 matches
+the float64 reference. The dense int64 matrix the models used to keep is
+listed for comparison.
+
+    python -m benchmarks.bench_vectors --queries 500
+"""
+import time
+import random
+import argparse
+
+import numpy as np
+
+from src.components.prepare_similarity_matrix import Model_Making, ModelMakingCourse
+
+STORAGES = ('float64', 'float32', 'int8')
+TOP_K = 10
+
+
+def sample_queries(model, tags, count, seed=0):
+    # Short queries built from random words of random documents
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        words = rng.choice(tags).split()
+        texts.append(' '.join(rng.sample(words, min(len(words), 6))))
+    return model.vectorize_queries(texts)
+
+
+def build(kind, storage):
+    if kind == 'project':
+        model = Model_Making(storage=storage)
+        model.model_building()
+        return model, model.vectors
+    model = ModelMakingCourse(storage=storage)
+    model.model_building_course()
+    return model, model.field_vectors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--queries', type=int, default=500)
+    args = parser.parse_args()
+
+    for kind in ('project', 'course'):
+        reference = None
+        print(f"\n{kind}")
+        print(f"{'storage':<10}{'MB':>10}{'us/query':>12}{'recall@10':>12}{'top-1 same':>12}")
+        for storage in STORAGES:
+            model, vectors = build(kind, storage)
+            if reference is None:
+                rows, cols = vectors.shape
+                print(f"{'dense i64':<10}{rows * cols * 8 / 1e6:>10.2f}")
+                queries = sample_queries(model, model.processed_data['tags'].tolist(), args.queries)
+
+            started = time.perf_counter()
+            count = queries.shape[0]
+            ranked = np.vstack([model.rank(queries[i:i + 1], TOP_K)[0] for i in range(count)])
+            per_query = (time.perf_counter() - started) / count * 1e6
+
+            if reference is None:
+                reference = ranked
+            recall = np.mean([len(set(a) & set(b)) / TOP_K for a, b in zip(ranked, reference)])
+            top1 = np.mean(ranked[:, 0] == reference[:, 0])
+            print(f"{storage:<10}{vectors.nbytes / 1e6:>10.2f}{per_query:>12.1f}{recall:>12.3f}{top1:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+import os
+
+# Admission control (src/admission.py) keeps its state per process and needs
+# threaded workers: a sync worker serves one request at a time, so nothing
+# would ever be queued or shed.
+bind = os.getenv('BIND', '0.0.0.0:8000')
+# Each worker loads its own models, and with PROJECT_SHARDS > 1 in process mode
+# its own shard processes: WEB_CONCURRENCY * PROJECT_SHARDS of them in total.
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+worker_class = 'gthread'
+# Room for the admitted requests plus the ones waiting in the admission queue
+threads = int(os.getenv('ADMISSION_MAX_IN_FLIGHT', '8')) + int(os.getenv('ADMISSION_MAX_QUEUE', '32'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+
+wsgi_app = 'app:app'
+
+
+def post_fork(server, worker):
+    # With --preload the app, and its log listener thread, was started in the master
+    from src.logger import reinstall_after_fork
+    reinstall_after_fork()
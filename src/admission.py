@@ -0,0 +1,200 @@
+"""
+Per-client rate limiting and load shedding for the Flask routes.
+
+All state here lives in one worker process. The app must run under gunicorn's
+gthread worker class (see gunicorn.conf.py): admission only queues and sheds
+when a process serves several requests at once, and a sync worker serves one.
+Give each worker ADMISSION_MAX_IN_FLIGHT + ADMISSION_MAX_QUEUE threads so
+queued requests have a thread to wait on.
+
+RATE_LIMIT_PER_SECOND and RATE_LIMIT_BURST are per client and per worker.
+Keep-alive connections pin a client to one worker, so each worker enforces the
+full budget; a client spreading requests over N workers gets up to N times it.
+
+Clients are keyed on the peer address, which behind a reverse proxy is the
+proxy itself. Per-client limits are therefore off until TRUSTED_PROXY_HOPS is
+set: 0 for a server exposed directly, or the number of proxies in front of it.
+"""
+import os
+import time
+import heapq
+import itertools
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from flask import request
+
+from src.logger import logging
+from src.metrics import metrics
+from src.api_responce import api_response
+
+PRIORITY_CHEAP = 0
+PRIORITY_COLD = 1
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        """
+        Classic token bucket refilled at `rate` tokens per second up to `burst`.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self, now):
+        """
+        Take one token; returns 0 on success or the seconds until one is available.
+        """
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class ClientRateLimiter:
+    def __init__(self, rate, burst, max_clients=10000):
+        """
+        Per-client token buckets, keeping only the most recently seen clients.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(self, client):
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.burst)
+                self._buckets[client] = bucket
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client)
+            return bucket.take(now)
+
+
+class AdmissionController:
+    def __init__(self, max_in_flight, max_queue, queue_timeout):
+        """
+        Bound concurrent work and queue the overflow by priority with a deadline.
+
+        Cheap requests (cache hits, static pages) are always dequeued ahead of
+        cold computations; anything that waits past the deadline is shed.
+        """
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._waiting = []
+        self._seq = itertools.count()
+
+    def _publish(self):
+        metrics.set_gauge('admission_in_flight', self._in_flight)
+        metrics.set_gauge('admission_queue_depth', len(self._waiting))
+
+    def acquire(self, priority=PRIORITY_COLD):
+        """
+        Wait for a slot; returns None when admitted or the reason it was shed.
+        """
+        with self._cond:
+            if self._in_flight < self.max_in_flight and not self._waiting:
+                self._in_flight += 1
+                self._publish()
+                return None
+            if len(self._waiting) >= self.max_queue:
+                return 'queue_full'
+
+            entry = (priority, next(self._seq))
+            heapq.heappush(self._waiting, entry)
+            self._publish()
+            deadline = time.monotonic() + self.queue_timeout
+            while True:
+                if self._waiting[0] == entry and self._in_flight < self.max_in_flight:
+                    heapq.heappop(self._waiting)
+                    self._in_flight += 1
+                    self._publish()
+                    self._cond.notify_all()
+                    return None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._waiting.remove(entry)
+                    heapq.heapify(self._waiting)
+                    self._publish()
+                    self._cond.notify_all()
+                    return 'deadline'
+                self._cond.wait(remaining)
+
+    def release(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._publish()
+            self._cond.notify_all()
+
+
+RATE_LIMIT_ENABLED = os.getenv('TRUSTED_PROXY_HOPS') is not None
+if not RATE_LIMIT_ENABLED:
+    logging.warning("TRUSTED_PROXY_HOPS is not set, per-client rate limiting is disabled.")
+
+rate_limiter = ClientRateLimiter(
+    rate=float(os.getenv('RATE_LIMIT_PER_SECOND', '5')),
+    burst=float(os.getenv('RATE_LIMIT_BURST', '20')),
+)
+admission = AdmissionController(
+    max_in_flight=int(os.getenv('ADMISSION_MAX_IN_FLIGHT', '8')),
+    max_queue=int(os.getenv('ADMISSION_MAX_QUEUE', '32')),
+    queue_timeout=float(os.getenv('ADMISSION_QUEUE_TIMEOUT', '2')),
+)
+
+
+def client_key():
+    # X-Forwarded-For is only applied to remote_addr by ProxyFix when
+    # TRUSTED_PROXY_HOPS is set, so clients cannot pick their own key
+    return request.remote_addr or 'unknown'
+
+
+def _reject(message, response_code, retry_after):
+    response, response_code = api_response(success=False, message=message,
+                                           response_code=response_code, data={})
+    response.headers['Retry-After'] = str(max(1, int(retry_after + 0.999)))
+    return response, response_code
+
+
+def admission_control(cheap_if=None):
+    """
+    Route decorator applying per-client rate limits and load shedding.
+
+    `cheap_if` is called inside the request context and should return True
+    when the request can be served without a cold computation.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            endpoint = request.endpoint
+            wait = rate_limiter.check(client_key()) if RATE_LIMIT_ENABLED else 0
+            if wait:
+                metrics.inc('admission_shed_total', reason='rate_limited', endpoint=endpoint)
+                return _reject("Too many requests", 429, wait)
+
+            cheap = cheap_if is not None and cheap_if(*args, **kwargs)
+            priority = PRIORITY_CHEAP if cheap else PRIORITY_COLD
+            reason = admission.acquire(priority)
+            if reason is not None:
+                logging.warning("Shedding %s request: %s", endpoint, reason)
+                metrics.inc('admission_shed_total', reason=reason, endpoint=endpoint)
+                return _reject("Server is busy, please retry", 503, admission.queue_timeout)
+
+            metrics.inc('admission_admitted_total', priority='cheap' if cheap else 'cold')
+            try:
+                return view(*args, **kwargs)
+            finally:
+                admission.release()
+        return wrapper
+    return decorator
@@ -7,4 +7,10 @@ def api_response( success=True, message='', response_code=200,data=None):
         "response_code" : response_code,
         "data": data
     }
-    return jsonify(response), response_code
\ No newline at end of file
+    return jsonify(response), response_code
+
+def error_response(error):
+    """
+    Map an exception from src.exception to a JSON error body and its HTTP status.
+    """
+    return jsonify({"error": str(error)}), getattr(error, 'status_code', 500)
@@ -0,0 +1,112 @@
+import os
+
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+# float64 is the full precision reference; float32 and int8 shrink the model
+VECTOR_STORAGE = os.getenv('VECTOR_STORAGE', 'float32')
+
+
+def top_k_similar(similarities, k):
+    """
+    Return the indices and scores of the k highest similarities in each row, best first.
+    """
+    k = min(k, similarities.shape[1])
+    top = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(similarities, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind='stable')
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+
+def _normalized_queries(queries, dtype):
+    # Queries may be dense rows or the vectorizer's sparse output; normalize
+    # sparsely and densify only the transposed batch for the product
+    queries = normalize(sparse.csr_matrix(queries, dtype=dtype))
+    return queries.T.toarray()
+
+
+def _csr_nbytes(matrix):
+    return matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+
+
+class DocumentVectors:
+    def __init__(self, matrix, dtype=np.float32):
+        """
+        Sparse document matrix scored with one product against normalized queries.
+        """
+        self.matrix = sparse.csr_matrix(matrix, dtype=dtype)
+
+    @property
+    def shape(self):
+        return self.matrix.shape
+
+    @property
+    def nbytes(self):
+        return _csr_nbytes(self.matrix)
+
+    def scores(self, queries):
+        """
+        Return an (n_queries, n_documents) array of dot products.
+        """
+        return self.matrix.dot(_normalized_queries(queries, self.matrix.dtype)).T
+
+    def take(self, rows):
+        subset = DocumentVectors.__new__(DocumentVectors)
+        subset.matrix = self.matrix[rows]
+        return subset
+
+
+class QuantizedDocumentVectors:
+    def __init__(self, matrix):
+        """
+        Sparse int8 codes with one float32 scale per row.
+
+        Each row is stored as round(value / scale) with scale = max(|row|) / 127,
+        and scores are rescaled after the integer-coded product.
+        """
+        matrix = sparse.csr_matrix(matrix, dtype=np.float32)
+        row_max = np.zeros(matrix.shape[0], dtype=np.float32)
+        if matrix.nnz:
+            row_max = np.asarray(abs(matrix).max(axis=1).todense(), dtype=np.float32).ravel()
+        self.scales = np.where(row_max > 0, row_max / 127.0, 1.0).astype(np.float32)
+        codes = sparse.diags(1.0 / self.scales).dot(matrix).tocsr()
+        codes.data = np.rint(codes.data).astype(np.int8)
+        self.codes = codes
+
+    @property
+    def shape(self):
+        return self.codes.shape
+
+    @property
+    def nbytes(self):
+        return _csr_nbytes(self.codes) + self.scales.nbytes
+
+    def scores(self, queries):
+        return self.codes.dot(_normalized_queries(queries, np.float32)).T * self.scales
+
+    def take(self, rows):
+        subset = QuantizedDocumentVectors.__new__(QuantizedDocumentVectors)
+        subset.codes = self.codes[rows]
+        subset.scales = self.scales[rows]
+        return subset
+
+
+def build_document_vectors(matrix, storage=None, normalize_rows=True):
+    """
+    Build the scoring store for a document-term matrix.
+
+    With normalize_rows the rows are L2-normalized first, so scores are cosine
+    similarities; pass False for matrices that are already weighted.
+    """
+    storage = storage or VECTOR_STORAGE
+    matrix = sparse.csr_matrix(matrix, dtype=np.float64)
+    if normalize_rows:
+        matrix = normalize(matrix)
+    if storage == 'float64':
+        return DocumentVectors(matrix, dtype=np.float64)
+    if storage == 'float32':
+        return DocumentVectors(matrix, dtype=np.float32)
+    if storage == 'int8':
+        return QuantizedDocumentVectors(matrix)
+    raise ValueError(f"Unknown vector storage: {storage}")
@@ -0,0 +1,303 @@
+import os
+import sys
+import time
+import fcntl
+import hashlib
+import threading
+from contextlib import contextmanager
+
+from src.exception import CustomException
+from src.logger import logging
+from src.metrics import metrics
+from src.components.prepare_similarity_matrix import Model_Making
+from src.components.prepare_similarity_matrix import ModelMakingCourse
+
+PROJECT_DATA_PATH = 'notebook/data/final_data_project.csv'
+COURSE_DATA_PATH = 'notebook/data/Coursera.csv'
+# Touched by /admin/reload; every worker's watcher fingerprints it with the data
+RELOAD_MARKER_PATH = os.getenv('MODEL_RELOAD_MARKER', 'artifacts/model_reload')
+
+
+def data_fingerprint(paths):
+    """
+    Fingerprint the data files by path, size and modification time.
+    """
+    digest = hashlib.sha1()
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+        except OSError:
+            digest.update(f"{path}:missing".encode())
+    return digest.hexdigest()[:10]
+
+
+def content_fingerprint(paths):
+    """
+    Fingerprint the data files by content, so checkouts and redeploys of the same data match.
+    """
+    digest = hashlib.sha1()
+    for path in paths:
+        digest.update(os.path.basename(path).encode())
+        try:
+            with open(path, 'rb') as file_obj:
+                for chunk in iter(lambda: file_obj.read(1 << 20), b''):
+                    digest.update(chunk)
+        except OSError:
+            digest.update(b'missing')
+    return digest.hexdigest()[:10]
+
+
+def available_memory_bytes():
+    """
+    Return MemAvailable from /proc/meminfo, or None when it cannot be read.
+    """
+    try:
+        with open('/proc/meminfo') as file_obj:
+            for line in file_obj:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        return None
+    return None
+
+
+class ModelBundle:
+    def __init__(self, version, project_model, course_model, fingerprint=None):
+        """
+        One immutable generation of the project and course recommenders.
+        """
+        self.version = version
+        self.fingerprint = fingerprint
+        self.project = project_model
+        self.course = course_model
+        self.leases = 0
+        self.retired = False
+        self.loaded_at = time.time()
+
+    def nbytes(self):
+        """
+        Approximate memory held by both models.
+
+        Counts the document vectors, the processed DataFrames (which dominate
+        since the vectors became sparse) and the vectorizer vocabularies.
+        """
+        total = 0
+        for model in (self.project, self.course):
+            for attr in ('vectors', 'field_vectors', 'vector', 'similarity_matrix'):
+                value = getattr(model, attr, None)
+                total += getattr(value, 'nbytes', 0) or 0
+            processed_data = getattr(model, 'processed_data', None)
+            if processed_data is not None:
+                total += int(processed_data.memory_usage(deep=True).sum())
+            vectorizer = getattr(model, 'count_vectorizer', None)
+            for terms in (getattr(vectorizer, 'vocabulary_', None), getattr(vectorizer, 'stop_words_', None)):
+                if terms:
+                    total += sum(sys.getsizeof(term) for term in terms) + sys.getsizeof(terms)
+        return total
+
+    def close(self):
+        """
+        Release resources held outside the arrays, such as shard workers.
+        """
+        for model in (self.project, self.course):
+            close = getattr(model, 'close', None)
+            if close is not None:
+                close()
+
+
+class ModelRegistry:
+    def __init__(self, data_paths=None, reload_marker=RELOAD_MARKER_PATH):
+        """
+        Hold the live ModelBundle and swap in rebuilt generations atomically.
+
+        Requests acquire the current bundle and release it when done, so a
+        retired generation stays alive until its last in-flight request ends.
+        The version is derived from the data files and the reload marker only,
+        so every worker process reports the same version for the same models.
+        """
+        self.data_paths = data_paths or [PROJECT_DATA_PATH, COURSE_DATA_PATH]
+        self.reload_marker = reload_marker
+        # Serializes builds across worker processes so headroom is checked one at a time
+        self.build_lock_path = reload_marker + '.lock'
+        self.min_headroom_bytes = int(os.getenv('MODEL_RELOAD_MIN_HEADROOM_MB', '256')) * 1024 * 1024
+        self.headroom_factor = float(os.getenv('MODEL_RELOAD_HEADROOM_FACTOR', '1.5'))
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._current = None
+        self._fingerprint = None
+        self._watcher = None
+        self._stop = threading.Event()
+
+    @property
+    def version(self):
+        current = self._current
+        return current.version if current is not None else None
+
+    def _watch_fingerprint(self):
+        return data_fingerprint(self.data_paths + [self.reload_marker])
+
+    def _build(self):
+        # The bundle fingerprint keys the precomputed recommendation store; it
+        # covers the data contents only, so forced reloads, fresh checkouts and
+        # redeploys of the same data keep the store valid
+        version = self._watch_fingerprint()
+        fingerprint = content_fingerprint(self.data_paths)
+        project_model = Model_Making()
+        project_model.model_building()
+        course_model = ModelMakingCourse()
+        course_model.model_building_course()
+        bundle = ModelBundle(version, project_model, course_model, fingerprint)
+        return bundle, version
+
+    @contextmanager
+    def _build_lock(self):
+        directory = os.path.dirname(self.build_lock_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.build_lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def load(self):
+        """
+        Build the first generation synchronously.
+        """
+        with self._build_lock():
+            bundle, fingerprint = self._build()
+        self._fingerprint = fingerprint
+        self._swap(bundle)
+        return bundle
+
+    def _check_headroom(self):
+        current = self._current
+        needed = self.min_headroom_bytes
+        if current is not None:
+            needed = max(needed, int(current.nbytes() * self.headroom_factor))
+        available = available_memory_bytes()
+        if available is None:
+            logging.warning("Cannot read available memory, skipping reload headroom check.")
+            return True
+        if available < needed:
+            logging.error(f"Model reload refused: {available} bytes available, {needed} required.")
+            metrics.inc('model_reload_total', result='no_headroom')
+            return False
+        return True
+
+    def _swap(self, bundle):
+        with self._lock:
+            old = self._current
+            self._current = bundle
+            if old is not None:
+                old.retired = True
+                drained = old.leases == 0
+        if old is not None:
+            metrics.set_gauge('model_version_info', 0, version=old.version)
+        metrics.set_gauge('model_version_info', 1, version=bundle.version)
+        if old is not None:
+            logging.info(f"Swapped model {old.version} -> {bundle.version}")
+            if drained:
+                self._on_drained(old)
+        else:
+            logging.info(f"Loaded model {bundle.version}")
+
+    def _on_drained(self, bundle):
+        bundle.close()
+        logging.info(f"Released retired model {bundle.version}")
+        metrics.inc('model_released_total')
+
+    def acquire(self):
+        """
+        Lease the current bundle for the duration of one request.
+        """
+        with self._lock:
+            bundle = self._current
+            if bundle is None:
+                raise CustomException("Model registry has not been loaded", sys)
+            bundle.leases += 1
+            return bundle
+
+    def release(self, bundle):
+        with self._lock:
+            bundle.leases -= 1
+            drained = bundle.retired and bundle.leases == 0
+        if drained:
+            self._on_drained(bundle)
+
+    def reload(self, force=False):
+        """
+        Rebuild the models and swap them in; returns True when a swap happened.
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            logging.info("Model reload already in progress.")
+            return False
+        try:
+            fingerprint = self._watch_fingerprint()
+            if not force and fingerprint == self._fingerprint:
+                return False
+
+            # Workers see the same change on the same poll; rebuild one at a time
+            # so each checks MemAvailable after the previous one has allocated
+            with self._build_lock():
+                if not self._check_headroom():
+                    return False
+                started = time.perf_counter()
+                bundle, fingerprint = self._build()
+            self._fingerprint = fingerprint
+            self._swap(bundle)
+            metrics.inc('model_reload_total', result='ok')
+            metrics.set_gauge('model_reload_seconds', round(time.perf_counter() - started, 3))
+            return True
+        except Exception as e:
+            logging.error(f"Model reload failed, keeping {self.version}: {e}")
+            metrics.inc('model_reload_total', result='error')
+            return False
+        finally:
+            self._reload_lock.release()
+
+    def reload_async(self, force=False):
+        """
+        Start a background reload and return immediately.
+        """
+        thread = threading.Thread(target=self.reload, kwargs={'force': force},
+                                  name='model-reload', daemon=True)
+        thread.start()
+        return thread
+
+    def request_reload(self):
+        """
+        Touch the reload marker so every worker's watcher rebuilds, and start a reload here.
+
+        Returns the version the workers will report once they have rebuilt.
+        """
+        directory = os.path.dirname(self.reload_marker)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.reload_marker, 'a'):
+            os.utime(self.reload_marker, None)
+        target_version = self._watch_fingerprint()
+        self.reload_async()
+        return target_version
+
+    def start_watcher(self, interval=None):
+        """
+        Poll the data files and reload in the background when they change.
+        """
+        if self._watcher is not None:
+            return
+        interval = interval or float(os.getenv('MODEL_WATCH_INTERVAL', '30'))
+
+        def watch():
+            while not self._stop.wait(interval):
+                if self._watch_fingerprint() != self._fingerprint:
+                    logging.info("Data files or reload marker changed, rebuilding models.")
+                    self.reload()
+
+        self._watcher = threading.Thread(target=watch, name='model-watcher', daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self):
+        self._stop.set()
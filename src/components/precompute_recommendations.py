@@ -0,0 +1,92 @@
+import sys
+import time
+import argparse
+
+from psycopg2.extras import RealDictCursor
+
+from src.exception import CustomException
+from src.logger import logging
+from src.database import connect_to_database
+from src.components.model_registry import ModelRegistry
+from src.components.profile_features import ProfileFeatures
+from src.components.recommendation_store import RecommendationStore, RECOMMENDATION_STORE_PATH
+from src.components.result_cache import RANK_DEPTH
+
+
+class RecommendationPrecomputer:
+    def __init__(self, store_path=RECOMMENDATION_STORE_PATH, chunk_size=500, top_k=None):
+        """
+        Batch job scoring every user profile against both models into a store.
+        """
+        self.store_path = store_path
+        self.chunk_size = chunk_size
+        self.top_k = top_k or RANK_DEPTH
+
+    def _score_chunk(self, models, rows):
+        features = []
+        for row in rows:
+            profile = ProfileFeatures(row)
+            if profile.is_complete():
+                features.append((str(row['user_id']), profile))
+        if not features:
+            return {}
+
+        texts = [profile.query_text for _, profile in features]
+        results = {}
+        for kind, model in (('project', models.project), ('course', models.course)):
+            # One matrix product for the whole chunk
+            ids, scores = model.rank(model.vectorize_queries(texts), self.top_k[kind])
+            results[kind] = [
+                (username, profile.hash, ids[i], scores[i])
+                for i, (username, profile) in enumerate(features)
+            ]
+        return results
+
+    def run(self):
+        """
+        Stream rec_system_userprofiledata with a server-side cursor and store top-k per user.
+        """
+        connection = None
+        store = RecommendationStore(self.store_path, readonly=False)
+        try:
+            registry = ModelRegistry()
+            models = registry.load()
+            logging.info(f"Precomputing recommendations with model {models.version}")
+
+            started = time.perf_counter()
+            total = 0
+            connection = connect_to_database()
+            # A named cursor keeps the result set on the server and streams it in chunks
+            with connection.cursor(name='precompute_profiles', cursor_factory=RealDictCursor) as cursor:
+                cursor.itersize = self.chunk_size
+                cursor.execute("SELECT * FROM rec_system_userprofiledata")
+                while True:
+                    rows = cursor.fetchmany(self.chunk_size)
+                    if not rows:
+                        break
+                    for kind, entries in self._score_chunk(models, rows).items():
+                        store.put_many(kind, models.fingerprint, entries)
+                    total += len(rows)
+                    logging.info(f"Precomputed {total} profiles")
+
+            logging.info(f"Precomputed {total} profiles in {time.perf_counter() - started:.1f}s")
+            return total
+
+        except Exception as e:
+            logging.error(f"Error in recommendation precomputation: {str(e)}")
+            raise CustomException(e, sys)
+
+        finally:
+            store.close()
+            if connection:
+                connection.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute recommendations for all users.")
+    parser.add_argument('--store', default=RECOMMENDATION_STORE_PATH)
+    parser.add_argument('--chunk-size', type=int, default=500)
+    args = parser.parse_args()
+
+    count = RecommendationPrecomputer(store_path=args.store, chunk_size=args.chunk_size).run()
+    print(f"Precomputed recommendations for {count} profiles into {args.store}")
@@ -99,23 +99,25 @@ class PreprocessingCourse:
 
             data['Skills'] = data['Skills'].str.replace('[()]', '', regex=True)
 
-            # Create 'tags' column
-            data['tags'] = (
-                data['Course Name'] + " " +
-                data['Difficulty Level'] + " " +
-                data['Course Description'] + " " +
-                data['Skills']
-            )
+            # Create per-field tag columns; difficulty is kept out of the text
+            # and applied as a filter by the model instead
+            field_columns = {
+                'name_tags': 'Course Name',
+                'description_tags': 'Course Description',
+                'skills_tags': 'Skills',
+            }
+            for tag_column, column in field_columns.items():
+                data[tag_column] = (
+                    data[column].fillna('').str.lower().str.replace(',', ' ', regex=False)
+                    .apply(lemmatize_text)
+                )
+
+            data['tags'] = data['name_tags'] + " " + data['description_tags'] + " " + data['skills_tags']
 
             # Rename columns
-            new_df = data[['Course Name', 'tags', 'Course URL', 'Course Description']].copy()
+            new_df = data[['Course Name', 'tags', *field_columns, 'Difficulty Level',
+                           'Course URL', 'Course Description']].copy()
             new_df.rename(columns={'Course Name': 'course_name'}, inplace=True)
-
-            # Lowercase and clean 'tags' column
-            new_df['tags'] = new_df['tags'].str.lower().str.replace(',', ' ', regex=False)
-
-            # Apply lemmatization
-            new_df['tags'] = new_df['tags'].apply(lemmatize_text)
             logging.info(f"Processed data shape: {new_df.shape}")
 
             return new_df
@@ -1,23 +1,47 @@
+import os
 import sys
 import random
+import numpy as np
 
 from sklearn.feature_extraction.text import CountVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import normalize
 
-from src.exception import CustomException
+from src.exception import CustomException, InvalidDifficultyError
 from src.logger import logging
 from src.components.prepare_processed_data import Preprocessing
 from src.components.prepare_processed_data import PreprocessingCourse
+from src.components.document_vectors import build_document_vectors, top_k_similar
+from src.components.sharded_index import ShardedIndex, SHARD_MODE
+from src.components.profile_features import parse_field
 from src.utils import lemmatize_text
 
+# The dense count matrix and the item-item similarity matrix are not used for
+# serving; build them only when needed for offline analysis
+BUILD_SIMILARITY_MATRIX = os.getenv('BUILD_SIMILARITY_MATRIX') == '1'
+
+# Split project scoring across this many shard workers; 1 scores in-process.
+# Every web worker starts its own shards, so keep WEB_CONCURRENCY * PROJECT_SHARDS
+# within the host's cores and memory.
+PROJECT_SHARDS = int(os.getenv('PROJECT_SHARDS', '1'))
+
 
 class Model_Making:
-    def __init__(self):
+    def __init__(self, storage=None, shards=None, shard_mode=None):
         """
         Initialize the Model_Making class.
+
+        storage selects the document vector format (float64, float32 or int8),
+        defaulting to VECTOR_STORAGE. With more than one shard, ranking fans
+        out to a ShardedIndex in shard_mode (default SHARD_MODE).
         """
+        self.storage = storage
+        self.shards = shards or PROJECT_SHARDS
+        self.shard_mode = shard_mode or SHARD_MODE
+        self.sharded_index = None
         self.count_vectorizer = None
         self.processed_data = None
+        self.vectors = None
         self.vector = None
         self.similarity_matrix = None
 
@@ -46,17 +70,27 @@ class Model_Making:
                 stop_words='english'
             )
 
-            # Transform tags to vector
-            self.vector = self.count_vectorizer.fit_transform(
+            # Transform tags to a sparse count matrix
+            counts = self.count_vectorizer.fit_transform(
                 self.processed_data['tags']
-            ).toarray()
+            )
+
+            # Compact, row-normalized vectors used for scoring
+            self.vectors = build_document_vectors(counts, storage=self.storage)
 
-            # Calculate similarity matrix
-            self.similarity_matrix = cosine_similarity(self.vector)
+            if self.shards > 1:
+                self.close()
+                self.sharded_index = ShardedIndex(self.vectors, self.shards, mode=self.shard_mode)
+                logging.info(f"Project scoring split into {self.shards} {self.shard_mode} shards")
 
-            logging.info(f"Vector shape: {self.vector.shape}")
+            if BUILD_SIMILARITY_MATRIX:
+                self.vector = counts.toarray()
+                self.similarity_matrix = cosine_similarity(self.vector)
+
+            logging.info(f"Vector shape: {counts.shape}, {self.vectors.nbytes} bytes")
 
             return {
+                'vectors': self.vectors,
                 'vector': self.vector,
                 'count_vectorizer': self.count_vectorizer,
                 'processed_data': self.processed_data,
@@ -82,17 +116,16 @@ class Model_Making:
         """
         try:
             # Ensure model is built
-            if self.vector is None or self.processed_data is None:
-                model_data = self.model_building()
-                self.vector = model_data['vector']
-                self.processed_data = model_data['processed_data']
-                self.similarity_matrix = model_data['similarity_matrix']
-
-            # Prepare input tags
-            input_tags_list = []
-            for attr in [input_skills, input_framework, input_tools, input_category, input_domain]:
-                if attr and attr != ['']:
-                    input_tags_list.extend([str(x).lower().strip() for x in attr])
+            if self.vectors is None or self.processed_data is None:
+                self.model_building()
+
+            # Prepare input tags; each input is a comma-separated string or a list of them
+            input_tags_list = [
+                token
+                for attr in [input_skills, input_framework, input_tools, input_category, input_domain]
+                for value in ([attr] if isinstance(attr, str) else attr or ())
+                for token in parse_field(value)
+            ]
             
             # Stem input tags
             # from src.utils import steming
@@ -100,17 +133,70 @@ class Model_Making:
             lemmatized_input_tags = lemmatize_text(" ".join(input_tags_list))
 
             # Vectorize input tags
-            input_vector = self.count_vectorizer.transform([lemmatized_input_tags]).toarray()
+            input_vector = self.vectorize_query(lemmatized_input_tags)
 
-            # Calculate similarities
-            similarities = cosine_similarity(input_vector, self.vector)[0]
+            return self.recommend_from_vector(input_vector, top_n=top_n)
+        
+        except Exception as e:
+            logging.error(f"Error in project recommendation: {str(e)}")
+            raise CustomException(e, sys)
 
+    def vectorize_query(self, query_text):
+        """
+        Vectorize already lemmatized query text with the fitted vectorizer.
+
+        Returns a sparse CSR row; it is small enough to memoize per profile.
+        """
+        return self.count_vectorizer.transform([query_text])
+
+    def vectorize_queries(self, query_texts):
+        """
+        Vectorize a batch of lemmatized query texts into a sparse CSR matrix, one row per text.
+        """
+        return self.count_vectorizer.transform(query_texts)
+
+    def rank(self, input_vectors, k):
+        """
+        Rank projects for each query row; returns (indices, scores) best first.
+        """
+        if self.sharded_index is not None:
+            return self.sharded_index.top_k(input_vectors, k)
+        similarities = self.vectors.scores(input_vectors)
+        return top_k_similar(similarities, k)
+
+    def close(self):
+        """
+        Stop the shard workers, if any.
+        """
+        if self.sharded_index is not None:
+            self.sharded_index.close()
+            self.sharded_index = None
+
+    def recommend_from_vector(self, input_vector, top_n=20):
+        """
+        Recommend projects for a query vector produced by vectorize_query.
+        
+        Returns:
+        - Lists of project names, descriptions, skills and row indices
+        """
+        try:
+            # Get extra results to allow shuffling
+            ranked_indices, _ = self.rank(input_vector, top_n + 6)
+            return self.recommend_from_ranking(ranked_indices[0], top_n=top_n)
+
+        except CustomException:
+            raise
+        except Exception as e:
+            logging.error(f"Error in project recommendation: {str(e)}")
+            raise CustomException(e, sys)
+
+    def recommend_from_ranking(self, ranked_indices, top_n=20):
+        """
+        Recommend projects from precomputed ranked indices, best first.
+        """
+        try:
             # Get top N similar projects
-            similar_projects = sorted(
-                list(enumerate(similarities)),
-                key=lambda x: x[1], 
-                reverse=True
-            )[1:top_n + 6]  # Get extra results to allow shuffling
+            similar_projects = [int(idx) for idx in ranked_indices[1:top_n + 6]]
 
             # Introduce randomness: shuffle the top results
             random.shuffle(similar_projects)
@@ -123,7 +209,7 @@ class Model_Making:
             project_skills = []
             index = []
 
-            for idx, score in similar_projects:
+            for idx in similar_projects:
                 project_name.append(self.processed_data.loc[idx, 'Project Name'])
                 project_description.append(self.processed_data.loc[idx, 'Project Description'])
                 project_skills.append(self.processed_data.loc[idx, 'Skills Required'])
@@ -137,25 +223,59 @@ class Model_Making:
         
 
 class ModelMakingCourse:
-    def __init__(self):
+    # Relative weight of each field's cosine similarity in the course score
+    FIELD_WEIGHTS = {
+        'name_tags': 0.3,
+        'skills_tags': 0.45,
+        'description_tags': 0.25,
+    }
+
+    def __init__(self, storage=None):
+        self.storage = storage
         self.vector = None
         self.processed_data = None
         self.similarity_matrix = None
         self.count_vectorizer = None
+        self.field_vectors = None
+        self.difficulty_masks = None
 
     def model_building_course(self):
         """
-        Build the course recommendation model by processing data and computing similarity matrix.
+        Build the course recommendation model from the weighted per-field vectors.
         """
         try:
             preprocessor = PreprocessingCourse()
             new_df = preprocessor.preprocessing_data_course()
 
             cv = CountVectorizer(max_features=5000, stop_words='english')
-            vectors = cv.fit_transform(new_df['tags']).toarray()
-            similarity_matrix = cosine_similarity(vectors)
+            cv.fit(new_df['tags'])
+
+            vectors, similarity_matrix = None, None
+            if BUILD_SIMILARITY_MATRIX:
+                vectors = cv.transform(new_df['tags']).toarray()
+                similarity_matrix = cosine_similarity(vectors)
+
+            # Weighted sum of the L2-normalized per-field matrices, so one sparse
+            # product against a normalized query gives the weighted field cosines
+            field_matrix = None
+            for column, weight in self.FIELD_WEIGHTS.items():
+                weighted = normalize(cv.transform(new_df[column])) * weight
+                field_matrix = weighted if field_matrix is None else field_matrix + weighted
+            self.field_vectors = build_document_vectors(field_matrix, storage=self.storage, normalize_rows=False)
+
+            # One boolean row mask per difficulty level, applied to the scores
+            levels = new_df['Difficulty Level'].fillna('').str.lower().str.strip()
+            self.difficulty_masks = {
+                level: (levels == level).to_numpy() for level in levels.unique() if level
+            }
+
+            self.vector = vectors
+            self.processed_data = new_df
+            self.similarity_matrix = similarity_matrix
+            self.count_vectorizer = cv
 
             return {
+                'field_vectors': self.field_vectors,
                 'vector': vectors,
                 'processed_data': new_df,
                 'similarity_matrix': similarity_matrix,
@@ -172,24 +292,20 @@ class ModelMakingCourse:
         """
         try:
             # Ensure model is built
-            if self.vector is None or self.processed_data is None:
-                model_data = self.model_building_course()
-                self.vector = model_data['vector']
-                self.processed_data = model_data['processed_data']
-                self.similarity_matrix = model_data['similarity_matrix']
-                self.count_vectorizer = model_data['cv']
+            if self.field_vectors is None or self.processed_data is None:
+                self.model_building_course()
 
             # Validate processed data
             required_columns = {'course_name', 'Course Description', 'Course URL'}
             if not required_columns.issubset(set(self.processed_data.columns)):
                 raise ValueError("Processed data does not contain required columns")
 
-            # Prepare input tags
+            # Prepare input tags; difficulty is applied as a filter, not as tokens
             input_tags_list = [
-                str(x).lower().strip()
-                for attr in [input_skills, input_difficulty, input_domain]
-                if attr and attr != ['']
-                for x in attr
+                token
+                for attr in [input_skills, input_domain]
+                for value in ([attr] if isinstance(attr, str) else attr or ())
+                for token in parse_field(value)
             ]
 
             if not input_tags_list:
@@ -200,24 +316,92 @@ class ModelMakingCourse:
             lemmatized_input_tags = lemmatize_text(" ".join(input_tags_list))
 
             # Vectorize input tags
-            input_vector = self.count_vectorizer.transform([lemmatized_input_tags]).toarray()
+            input_vector = self.vectorize_query(lemmatized_input_tags)
+
+            return self.recommend_from_vector(input_vector, top_n=top_n, difficulty=input_difficulty)
+
+        except Exception as e:
+            logging.error(f"Error in course recommendation: {str(e)}")
+            raise CustomException(e, sys)
+
+    def vectorize_query(self, query_text):
+        """
+        Vectorize already lemmatized query text with the fitted vectorizer.
+
+        Returns a sparse CSR row; it is small enough to memoize per profile.
+        """
+        return self.count_vectorizer.transform([query_text])
+
+    def vectorize_queries(self, query_texts):
+        """
+        Vectorize a batch of lemmatized query texts into a sparse CSR matrix, one row per text.
+        """
+        return self.count_vectorizer.transform(query_texts)
+
+    def difficulty_mask(self, difficulty):
+        """
+        Boolean row mask of courses at the requested difficulty level(s), or None for all.
 
-            # Calculate similarities
-            similarities = cosine_similarity(input_vector, self.vector)[0]
+        Raises InvalidDifficultyError for a level no course has.
+        """
+        levels = [
+            level
+            for value in ([difficulty] if isinstance(difficulty, str) else difficulty or ())
+            for level in parse_field(value)
+        ]
+        mask = None
+        for level in levels:
+            level_mask = self.difficulty_masks.get(level)
+            if level_mask is None:
+                raise InvalidDifficultyError(level)
+            mask = level_mask if mask is None else mask | level_mask
+        return mask
+
+    def rank(self, input_vectors, k, difficulty=None):
+        """
+        Rank courses for each query row; returns (indices, scores) best first.
 
+        Scores are the FIELD_WEIGHTS-weighted cosine similarities against the
+        name, skills and description fields. Courses outside the difficulty
+        filter are masked out of the scores, which is cheaper than copying
+        the matching rows for every query.
+        """
+        scores = self.field_vectors.scores(input_vectors)
+        mask = self.difficulty_mask(difficulty)
+        if mask is not None:
+            scores[:, ~mask] = -np.inf
+            k = min(k, int(mask.sum()))
+        return top_k_similar(scores, k)
+
+    def recommend_from_vector(self, input_vector, top_n=5, difficulty=None):
+        """
+        Recommend courses for a query vector produced by vectorize_query.
+        """
+        try:
+            # Extra results for better randomness
+            ranked_indices, _ = self.rank(input_vector, top_n + 6, difficulty=difficulty)
+            return self.recommend_from_ranking(ranked_indices[0], top_n=top_n)
+
+        except CustomException:
+            raise
+        except Exception as e:
+            logging.error(f"Error in course recommendation: {str(e)}")
+            raise CustomException(e, sys)
+
+    def recommend_from_ranking(self, ranked_indices, top_n=5):
+        """
+        Recommend courses from precomputed ranked indices, best first.
+        """
+        try:
             # Get top N similar courses
-            similar_courses = sorted(
-                enumerate(similarities),
-                key=lambda x: x[1],
-                reverse=True
-            )[1:top_n + 6]  # Extra results for better randomness
+            similar_courses = [int(idx) for idx in ranked_indices[1:top_n + 6]]
 
             # Shuffle the top results for randomness
             random.shuffle(similar_courses)
             similar_courses = similar_courses[:top_n]
 
             course_name, course_description, course_url = [], [], []
-            for idx, score in similar_courses:
+            for idx in similar_courses:
                 if idx < len(self.processed_data):
                     course_name.append(self.processed_data.loc[idx, 'course_name'])
                     course_description.append(self.processed_data.loc[idx, 'Course Description'])
@@ -0,0 +1,105 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from src.logger import logging
+from src.metrics import metrics
+from src.utils import lemmatize_text
+
+PROFILE_FIELDS = (
+    'interest_field', 'interest_domain', 'programming_language', 'frameworks',
+    'cloud_and_database', 'projects', 'achievements_and_awards', 'academic_year', 'branch',
+)
+
+# Fields that must be filled in before we can recommend anything
+REQUIRED_FIELDS = ('interest_field', 'interest_domain', 'programming_language', 'frameworks')
+
+# Fields that make up the query for both the project and the course models
+QUERY_FIELDS = ('programming_language', 'frameworks', 'cloud_and_database', 'interest_field', 'interest_domain')
+
+
+def profile_hash(user_data):
+    """
+    Stable hash of the profile fields the recommenders read.
+    """
+    values = '\x1f'.join(str(user_data.get(field)) for field in PROFILE_FIELDS)
+    return hashlib.sha1(values.encode()).hexdigest()
+
+
+def parse_field(value):
+    """
+    Split a comma-separated profile field into lowercase tokens; None gives ().
+    """
+    if not value:
+        return ()
+    return tuple(token for token in (part.strip().lower() for part in str(value).split(',')) if token)
+
+
+class ProfileFeatures:
+    def __init__(self, user_data, hash_value=None):
+        """
+        Parsed and normalized view of one rec_system_userprofiledata row.
+        """
+        self.hash = hash_value or profile_hash(user_data)
+        self.fields = {field: parse_field(user_data.get(field)) for field in PROFILE_FIELDS}
+        self.query_text = lemmatize_text(
+            ' '.join(token for field in QUERY_FIELDS for token in self.fields[field])
+        )
+
+    def is_complete(self):
+        return all(self.fields[field] for field in REQUIRED_FIELDS)
+
+
+class ProfileQuery:
+    def __init__(self, features, project_vector, course_vector):
+        """
+        Query vectors for both recommenders built from one ProfileFeatures.
+        """
+        self.features = features
+        self.project_vector = project_vector
+        self.course_vector = course_vector
+
+
+class ProfileFeaturizer:
+    def __init__(self, max_entries=4096):
+        """
+        Memoize profile featurization per (profile hash, model version).
+
+        A user's project and course calls share the parsed fields, the
+        lemmatized query and both query vectors, which stay sparse so a full
+        memo costs a few KB per entry rather than dense vocabulary-sized rows.
+        """
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def featurize(self, user_data, models):
+        hash_value = profile_hash(user_data)
+        key = (hash_value, models.version)
+        with self._lock:
+            query = self._cache.get(key)
+            if query is not None:
+                self._cache.move_to_end(key)
+                metrics.inc('profile_features_total', result='hit')
+                return query
+
+        metrics.inc('profile_features_total', result='miss')
+        features = ProfileFeatures(user_data, hash_value)
+        if features.is_complete():
+            query = ProfileQuery(
+                features,
+                models.project.vectorize_query(features.query_text),
+                models.course.vectorize_query(features.query_text),
+            )
+        else:
+            logging.info("Profile %s is incomplete, skipping vectorization", hash_value[:10])
+            query = ProfileQuery(features, None, None)
+
+        with self._lock:
+            self._cache[key] = query
+            if len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return query
+
+
+profile_featurizer = ProfileFeaturizer()
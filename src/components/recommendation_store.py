@@ -0,0 +1,120 @@
+import os
+import sys
+import time
+import sqlite3
+import threading
+
+import numpy as np
+
+from src.exception import CustomException
+from src.logger import logging
+from src.metrics import metrics
+
+RECOMMENDATION_STORE_PATH = os.getenv('RECOMMENDATION_STORE_PATH', 'artifacts/recommendations.sqlite')
+# How long an entry is served when the caller has no profile hash to compare,
+# e.g. before the user gate has loaded the profile hashes
+RECOMMENDATION_STORE_TTL = float(os.getenv('RECOMMENDATION_STORE_TTL', '300'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recommendations (
+    username TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    profile_hash TEXT NOT NULL,
+    model_fingerprint TEXT NOT NULL,
+    ids BLOB NOT NULL,
+    scores BLOB NOT NULL,
+    computed_at REAL NOT NULL,
+    PRIMARY KEY (username, kind)
+) WITHOUT ROWID
+"""
+
+
+class RecommendationStore:
+    def __init__(self, path=RECOMMENDATION_STORE_PATH, readonly=True, max_age=RECOMMENDATION_STORE_TTL):
+        """
+        SQLite lookup table of precomputed top-k ids and scores per user.
+
+        Ids are stored as int32 and scores as float32 blobs. An entry is only
+        served when its model fingerprint still matches and, when the caller
+        has the profile hash, that matches too; without one it must be younger
+        than max_age seconds.
+        """
+        self.path = path
+        self.readonly = readonly
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._connection = None
+
+    def _connect(self):
+        if self._connection is None:
+            if self.readonly:
+                if not os.path.exists(self.path):
+                    return None
+                uri = f"file:{os.path.abspath(self.path)}?mode=ro"
+                self._connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            else:
+                dir_path = os.path.dirname(self.path)
+                if dir_path:
+                    os.makedirs(dir_path, exist_ok=True)
+                self._connection = sqlite3.connect(self.path, check_same_thread=False)
+                self._connection.execute('PRAGMA journal_mode=WAL')
+                self._connection.execute(SCHEMA)
+        return self._connection
+
+    def lookup(self, username, kind, model_fingerprint, profile_hash=None):
+        """
+        Return the stored ranked ids, or None when missing, stale or expired.
+        """
+        with self._lock:
+            connection = self._connect()
+            if connection is None:
+                return None
+            try:
+                row = connection.execute(
+                    "SELECT profile_hash, model_fingerprint, ids, computed_at FROM recommendations "
+                    "WHERE username = ? AND kind = ?",
+                    (username, kind),
+                ).fetchone()
+            except sqlite3.Error as e:
+                logging.warning(f"Recommendation store lookup failed: {e}")
+                return None
+
+        if row is None:
+            metrics.inc('recommendation_store_total', kind=kind, result='missing')
+            return None
+        if row[1] != model_fingerprint or (profile_hash is not None and row[0] != profile_hash):
+            metrics.inc('recommendation_store_total', kind=kind, result='stale')
+            return None
+        if profile_hash is None and time.time() - row[3] > self.max_age:
+            metrics.inc('recommendation_store_total', kind=kind, result='expired')
+            return None
+        metrics.inc('recommendation_store_total', kind=kind, result='hit')
+        return np.frombuffer(row[2], dtype=np.int32)
+
+    def put_many(self, kind, model_fingerprint, entries):
+        """
+        Insert or replace (username, profile_hash, ids, scores) entries.
+        """
+        now = time.time()
+        rows = [
+            (username, kind, profile_hash, model_fingerprint,
+             np.asarray(ids, dtype=np.int32).tobytes(),
+             np.asarray(scores, dtype=np.float32).tobytes(), now)
+            for username, profile_hash, ids, scores in entries
+        ]
+        try:
+            with self._lock:
+                connection = self._connect()
+                with connection:
+                    connection.executemany(
+                        "INSERT OR REPLACE INTO recommendations VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        rows,
+                    )
+        except sqlite3.Error as e:
+            raise CustomException(e, sys)
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
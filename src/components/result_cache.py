@@ -0,0 +1,79 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+
+from src.metrics import metrics
+from src.singleflight import SingleFlight
+
+# Ranked ids kept per query: the largest top_n the routes ask for plus the shuffle margin
+RANK_DEPTH = {'project': 26, 'course': 11}
+
+
+class TTLCache:
+    def __init__(self, name, ttl, max_entries):
+        """
+        Bounded LRU cache whose entries expire `ttl` seconds after being stored.
+        """
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] >= now:
+                self._entries.move_to_end(key)
+                metrics.inc('cache_requests_total', cache=self.name, result='hit')
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+        metrics.inc('cache_requests_total', cache=self.name, result='miss')
+        return None
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[0] >= time.monotonic()
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class RankingCache:
+    def __init__(self, ttl=None, max_entries=20000):
+        """
+        Ranked ids per (kind, model version, lemmatized query, difficulty).
+
+        Shared by the JSON APIs and the HTML form routes; concurrent misses for
+        the same key are computed once.
+        """
+        self._cache = TTLCache('ranking', ttl or float(os.getenv('RANKING_CACHE_TTL', '300')), max_entries)
+        self._flight = SingleFlight('ranking')
+
+    def ranked(self, kind, model, model_version, query_text, query_vector=None, difficulty=None):
+        key = (kind, model_version, query_text, difficulty)
+        ranked = self._cache.get(key)
+        if ranked is not None:
+            return ranked
+        return self._flight.do(key, self._compute, key, model, query_text, query_vector, difficulty)
+
+    def _compute(self, key, model, query_text, query_vector, difficulty):
+        if query_vector is None:
+            query_vector = model.vectorize_query(query_text)
+        kwargs = {'difficulty': difficulty} if difficulty else {}
+        indices, _ = model.rank(query_vector, RANK_DEPTH[key[0]], **kwargs)
+        ranked = indices[0]
+        self._cache.put(key, ranked)
+        return ranked
+
+
+ranking_cache = RankingCache()
+page_cache = TTLCache('page', float(os.getenv('PAGE_CACHE_TTL', '60')), 5000)
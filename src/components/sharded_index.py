@@ -0,0 +1,198 @@
+import os
+import time
+import pickle
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from src.logger import logging
+from src.metrics import metrics
+from src.components.document_vectors import top_k_similar
+
+# 'process' holds each shard in its own worker process; 'simulated-remote'
+# keeps shards in-process but goes through a serialized request/reply
+SHARD_MODE = os.getenv('SHARD_MODE', 'process')
+SHARD_LATENCY = float(os.getenv('SHARD_LATENCY_MS', '0')) / 1000
+# spawn and forkserver re-import the main module in every worker, which
+# would rebuild the models when the app is started as a script
+SHARD_START_METHOD = os.getenv('SHARD_START_METHOD', 'fork')
+
+# The store being split, set by ProcessShard._spawn right before it forks so
+# the worker inherits it instead of receiving a pickled copy of its rows
+_source = None
+_spawn_lock = threading.Lock()
+
+# Set in each shard worker process by _load_shard
+_shard = None
+
+
+def _load_shard(start, stop):
+    global _shard
+    _shard = (_source.take(slice(start, stop)), start)
+
+
+def _shard_ready():
+    return _shard is not None
+
+
+def _shard_top_k(queries, k):
+    vectors, offset = _shard
+    indices, scores = top_k_similar(vectors.scores(queries), k)
+    return indices + offset, scores
+
+
+class ProcessShard:
+    def __init__(self, vectors, start, stop, index):
+        """
+        Rows [start, stop) of `vectors` held by a dedicated single-process worker.
+
+        The worker is forked and slices its rows from the inherited store, so
+        the parent never holds a second copy of them. Forks happen while the
+        log listener and, on reloads and restarts, the request, watcher and
+        refresh threads are running; the worker only runs numpy scoring and
+        never logs, so it does not touch locks those threads may have held.
+
+        If the worker dies, the requests that hit the failure score the rows
+        in-process and the worker is replaced.
+        """
+        self.source = vectors
+        self.start = start
+        self.stop = stop
+        self.index = index
+        self.rows = stop - start
+        self._lock = threading.Lock()
+        self._executor = self._spawn()
+
+    def _spawn(self):
+        global _source
+        # Shards of an old and a new bundle may restart at the same time
+        with _spawn_lock:
+            _source = self.source
+            try:
+                executor = ProcessPoolExecutor(
+                    max_workers=1,
+                    mp_context=multiprocessing.get_context(SHARD_START_METHOD),
+                    initializer=_load_shard,
+                    initargs=(self.start, self.stop),
+                )
+                # The pool forks lazily on its first task; fork now, while _source is set
+                executor.submit(_shard_ready).result()
+            finally:
+                _source = None
+        return executor
+
+    def submit(self, queries, k):
+        executor = self._executor
+        try:
+            return executor, executor.submit(_shard_top_k, queries, k)
+        except BrokenProcessPool:
+            return executor, None
+
+    def result(self, pending, queries, k):
+        executor, future = pending
+        if future is not None:
+            try:
+                return future.result()
+            except BrokenProcessPool:
+                pass
+        self._restart(executor)
+        indices, scores = top_k_similar(self.source.take(slice(self.start, self.stop)).scores(queries), k)
+        return indices + self.start, scores
+
+    def _restart(self, broken):
+        with self._lock:
+            if self._executor is not broken:
+                # Another request already replaced the worker
+                return
+            logging.error("Shard %s worker died, scoring in-process and restarting it", self.index)
+            metrics.inc('shard_failures_total', shard=str(self.index))
+            broken.shutdown(wait=False, cancel_futures=True)
+            try:
+                self._executor = self._spawn()
+            except Exception as e:
+                # Keep the broken pool so the next request retries the restart
+                logging.error("Restarting shard %s failed: %s", self.index, e)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class SimulatedRemoteShard:
+    def __init__(self, vectors, offset, executor, latency=SHARD_LATENCY):
+        """
+        Stand-in for a shard on another host.
+
+        Every request and reply is pickled as it would be on the wire, and
+        `latency` seconds are added per call to mimic the network hop.
+        """
+        self.rows = vectors.shape[0]
+        self.vectors = vectors
+        self.offset = offset
+        self.latency = latency
+        self._executor = executor
+
+    def _handle(self, payload):
+        queries, k = pickle.loads(payload)
+        if self.latency:
+            time.sleep(self.latency)
+        indices, scores = top_k_similar(self.vectors.scores(queries), k)
+        return pickle.dumps((indices + self.offset, scores))
+
+    def submit(self, queries, k):
+        return self._executor.submit(self._handle, pickle.dumps((queries, k)))
+
+    def result(self, pending, queries, k):
+        return pickle.loads(pending.result())
+
+    def close(self):
+        pass
+
+
+class ShardedIndex:
+    def __init__(self, vectors, num_shards, mode=SHARD_MODE, latency=SHARD_LATENCY):
+        """
+        Split a document store into row-range shards and rank queries across them.
+
+        Each shard returns its local top-k with global row ids, and the partial
+        results are merged into the overall top-k. latency only applies to
+        simulated-remote shards.
+
+        Process shards are per web process: W gunicorn workers with N shards
+        run W * N shard processes.
+        """
+        self.mode = mode
+        self._executor = None
+        bounds = np.linspace(0, vectors.shape[0], num_shards + 1).astype(int)
+        if mode == 'simulated-remote':
+            self._executor = ThreadPoolExecutor(max_workers=num_shards, thread_name_prefix='shard')
+        elif mode != 'process':
+            raise ValueError(f"Unknown shard mode: {mode}")
+
+        self.shards = []
+        for index, (start, stop) in enumerate(zip(bounds[:-1], bounds[1:])):
+            if mode == 'process':
+                self.shards.append(ProcessShard(vectors, int(start), int(stop), index))
+            else:
+                shard_vectors = vectors.take(slice(start, stop))
+                self.shards.append(SimulatedRemoteShard(shard_vectors, int(start), self._executor, latency))
+
+    def top_k(self, queries, k):
+        """
+        Return (indices, scores) of the k best documents per query row, best first.
+        """
+        pending = [shard.submit(queries, k) for shard in self.shards]
+        results = [shard.result(item, queries, k) for shard, item in zip(self.shards, pending)]
+
+        indices = np.hstack([result[0] for result in results])
+        scores = np.hstack([result[1] for result in results])
+        order, top_scores = top_k_similar(scores, k)
+        return np.take_along_axis(indices, order, axis=1), top_scores
+
+    def close(self):
+        for shard in self.shards:
+            shard.close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
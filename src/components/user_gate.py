@@ -0,0 +1,170 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+
+from src.exception import ProfileNotFoundError, UserNotFoundError, IncompleteProfileError
+from src.logger import logging
+from src.metrics import metrics
+from src.database import connect_to_database
+from src.components.profile_features import PROFILE_FIELDS, REQUIRED_FIELDS, profile_hash
+
+# Outcomes that depend only on the user's rows, so they are safe to cache
+CACHEABLE_ERRORS = (UserNotFoundError, ProfileNotFoundError, IncompleteProfileError)
+
+# Profiles with every field the recommenders require, with the fields that are hashed
+KNOWN_USERS_QUERY = (
+    f"SELECT user_id, {', '.join(PROFILE_FIELDS)} FROM rec_system_userprofiledata WHERE "
+    + " AND ".join(f"COALESCE({field}, '') <> ''" for field in REQUIRED_FIELDS)
+)
+
+
+class NegativeCache:
+    def __init__(self, ttl, max_entries=50000):
+        """
+        Remember recent CACHEABLE_ERRORS outcomes per username for `ttl` seconds.
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, username):
+        """
+        Return a fresh instance of the cached error, or None.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None:
+                return None
+            expires, error_type, args = entry
+            if expires < now:
+                del self._entries[username]
+                return None
+        # A new instance per hit so tracebacks do not pile up on a shared one
+        return error_type(*args)
+
+    def put(self, username, error):
+        """
+        Cache the error; an unexpired entry keeps its expiry so repeated failures cannot extend it.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(username)
+            expires = entry[0] if entry is not None and entry[0] >= now else now + self.ttl
+            self._entries[username] = (expires, type(error), error.args)
+            self._entries.move_to_end(username)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard_many(self, usernames):
+        """
+        Drop the entries of any of the given usernames; returns how many were dropped.
+        """
+        with self._lock:
+            stale = [username for username in self._entries if username in usernames]
+            for username in stale:
+                del self._entries[username]
+        return len(stale)
+
+
+class UserGate:
+    def __init__(self, negative_ttl=None, refresh_interval=None):
+        """
+        Answer requests for unknown or incomplete users without touching the DB.
+
+        A negative cache covers usernames that recently failed, and the profile
+        hashes of users with complete profiles, reloaded in the background,
+        cover first-time probes. Until the first load succeeds every username
+        passes. New and edited profiles become visible within one refresh
+        interval.
+        """
+        self.negative_cache = NegativeCache(negative_ttl or float(os.getenv('NEGATIVE_CACHE_TTL', '30')))
+        self.refresh_interval = refresh_interval or float(os.getenv('KNOWN_USERS_REFRESH', '60'))
+        self._profile_hashes = None
+        self._loaded_at = None
+        self._refresher = None
+        self._stop = threading.Event()
+
+    def check(self, username):
+        """
+        Raise the cached error or ProfileNotFoundError for users we know cannot succeed.
+        """
+        error = self.negative_cache.get(username)
+        if error is not None:
+            metrics.inc('user_gate_total', result='negative_cache')
+            raise error
+
+        profile_hashes = self._profile_hashes
+        if profile_hashes is not None and username not in profile_hashes:
+            metrics.inc('user_gate_total', result='filtered')
+            error = ProfileNotFoundError(username)
+            self.negative_cache.put(username, error)
+            raise error
+
+        metrics.inc('user_gate_total', result='pass')
+
+    def remember(self, username, error):
+        """
+        Cache an error from the DB fetch or profile validation; not for errors raised by check().
+        """
+        if isinstance(error, CACHEABLE_ERRORS):
+            self.negative_cache.put(username, error)
+
+    def profile_hash(self, username):
+        """
+        Profile hash of the user as of the last refresh, or None when unknown or not loaded.
+        """
+        profile_hashes = self._profile_hashes
+        return profile_hashes.get(username) if profile_hashes is not None else None
+
+    def refresh(self):
+        """
+        Reload the usernames with complete profiles and their profile hashes; keeps the old ones on failure.
+        """
+        connection = None
+        try:
+            started = time.perf_counter()
+            connection = connect_to_database()
+            with connection.cursor() as cursor:
+                cursor.execute(KNOWN_USERS_QUERY)
+                profile_hashes = {
+                    str(row[0]): profile_hash(dict(zip(PROFILE_FIELDS, row[1:])))
+                    for row in cursor.fetchall()
+                }
+            self._profile_hashes = profile_hashes
+            self._loaded_at = time.time()
+            # Users who completed their profile since they were cached as failing
+            cleared = self.negative_cache.discard_many(profile_hashes)
+            if cleared:
+                metrics.inc('user_gate_cleared_total', cleared)
+            metrics.set_gauge('known_users', len(profile_hashes))
+            metrics.set_gauge('known_users_refresh_seconds', round(time.perf_counter() - started, 3))
+            logging.info("Loaded %s known usernames", len(profile_hashes))
+            return True
+        except Exception as e:
+            logging.warning("Known users refresh failed, keeping previous set: %s", e)
+            metrics.inc('known_users_refresh_errors_total')
+            return False
+        finally:
+            if connection:
+                connection.close()
+
+    def start_refresher(self):
+        """
+        Load the username set now and keep refreshing it in a daemon thread.
+        """
+        if self._refresher is not None:
+            return
+
+        def refresh_loop():
+            self.refresh()
+            while not self._stop.wait(self.refresh_interval):
+                self.refresh()
+
+        self._refresher = threading.Thread(target=refresh_loop, name='known-users-refresh', daemon=True)
+        self._refresher.start()
+
+    def stop_refresher(self):
+        self._stop.set()
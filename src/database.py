@@ -0,0 +1,76 @@
+import os
+import sys
+from dotenv import load_dotenv
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+from src.exception import CustomException, DatabaseError, UserNotFoundError
+from src.logger import logging
+
+# Load environment variables
+load_dotenv()
+
+# Database connection settings
+DATABASE_CONFIG = {
+    'dbname': os.getenv('DB_NAME'),
+    'user': os.getenv('DB_USER'),
+    'password': os.getenv('DB_PASSWORD'),
+    'host': os.getenv('DB_HOST'),
+    'port': os.getenv('DB_PORT'),
+    'sslmode': os.getenv('DB_SSLMODE'),
+}
+
+# Connect to the database
+def connect_to_database():
+    try:
+        logging.info("Attempting to connect to the database.", extra={'sample': 'fetch_user_data'})
+        connection = psycopg2.connect(**DATABASE_CONFIG)
+        logging.info("Database connection successful.", extra={'sample': 'fetch_user_data'})
+        return connection
+    except psycopg2.Error as e:
+        logging.error("Error connecting to the database: %s", e)
+        raise DatabaseError(f"Database connection error: {e}", sys)
+
+# Fetch user data by username
+def fetch_user_data(username):
+    connection = None
+    try:
+        logging.info("Fetching data for username: %s", username, extra={'sample': 'fetch_user_data'})
+        connection = connect_to_database()
+        with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+            # Query to fetch basic user data
+            query1 = "SELECT id, username, email, first_name, last_name FROM auth_user WHERE username = %s"
+            cursor.execute(query1, (username,))
+            user_data1 = cursor.fetchone()
+            logging.debug("Basic user data fetched: %s", user_data1, extra={'sample': 'fetch_user_data'})
+
+            if not user_data1:
+                raise UserNotFoundError(username)
+
+            # Query to fetch user profile data
+            query2 = "SELECT * FROM rec_system_userprofiledata WHERE user_id = %s"
+            cursor.execute(query2, (username,))
+            user_data2 = cursor.fetchone()
+            logging.debug("User profile data fetched: %s", user_data2, extra={'sample': 'fetch_user_data'})
+
+            if not user_data2:
+                logging.warning("No profile data found for user ID: %s", username)
+
+            return user_data1, user_data2
+
+    except CustomException:
+        raise
+
+    except psycopg2.Error as e:
+        logging.error("Database query error: %s", e)
+        raise DatabaseError(f"Error fetching user data: {e}", sys)
+
+    except Exception as e:
+        logging.error("Unexpected error: %s", e)
+        raise CustomException(f"Unexpected error while fetching user data: {e}", sys)
+
+    finally:
+        if connection:
+            connection.close()
+            logging.info("Database connection closed.", extra={'sample': 'fetch_user_data'})
@@ -3,18 +3,97 @@ from src.logger import logging
 
 def error_message_detail(error,error_detail:sys):
     _,_,exc_tb=error_detail.exc_info()
+    if exc_tb is None:
+        return "Error occured in python script name [unknown] line number [0] error message[{0}]".format(str(error))
     file_name=exc_tb.tb_frame.f_code.co_filename
     error_message="Error occured in python script name [{0}] line number [{1}] error message[{2}]".format(
      file_name,exc_tb.tb_lineno,str(error))
 
     return error_message
 
-    
+
 
 class CustomException(Exception):
-    def __init__(self,error_message,error_detail:sys):
+    status_code = 500
+
+    def __init__(self,error_message,error_detail:sys=None):
+        if isinstance(error_message, CustomException):
+            # Re-wrapping keeps the original message, location and status instead of nesting
+            super().__init__(error_message.message)
+            self.message=error_message.message
+            self._location=error_message._location
+            self._rendered=None
+            self.status_code=error_message.status_code
+            return
         super().__init__(error_message)
-        self.error_message=error_message_detail(error_message,error_detail=error_detail)
-    
+        self.message=error_message
+        self._rendered=None
+        # Only grab the location here; the message string is built on first use
+        exc_tb=error_detail.exc_info()[2] if error_detail is not None else None
+        if exc_tb is not None:
+            self._location=(exc_tb.tb_frame.f_code.co_filename,exc_tb.tb_lineno)
+        else:
+            self._location=None
+
+    @property
+    def error_message(self):
+        if self._rendered is None:
+            file_name,line_number=self._location or ('unknown',0)
+            self._rendered="Error occured in python script name [{0}] line number [{1}] error message[{2}]".format(
+             file_name,line_number,str(self.message))
+        return self._rendered
+
     def __str__(self):
-        return self.error_message
\ No newline at end of file
+        return self.error_message
+
+
+class ClientError(CustomException):
+    """
+    Expected, request-caused failure; carries no traceback and maps straight to an HTTP status.
+    """
+    status_code = 400
+    message_template = "{0}"
+
+    def __init__(self,*args):
+        Exception.__init__(self,*args)
+        self._location=None
+        self._rendered=None
+
+    @property
+    def message(self):
+        return self.message_template.format(*self.args)
+
+    @property
+    def error_message(self):
+        if self._rendered is None:
+            self._rendered=self.message
+        return self._rendered
+
+
+class UserNotFoundError(ClientError):
+    status_code = 404
+    message_template = "User not found for username: {0}"
+
+
+class ProfileNotFoundError(ClientError):
+    status_code = 404
+    message_template = "User data not found for username: {0}"
+
+
+class IncompleteProfileError(ClientError):
+    status_code = 422
+    message_template = "Incomplete user data for username: {0}"
+
+
+class NoRecommendationsError(ClientError):
+    status_code = 404
+    message_template = "No recommendations found"
+
+
+class InvalidDifficultyError(ClientError):
+    status_code = 400
+    message_template = "Unknown difficulty level: {0}"
+
+
+class DatabaseError(CustomException):
+    status_code = 503
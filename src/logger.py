@@ -1,15 +1,126 @@
 import logging
+import logging.handlers
 import os
-from datetime import datetime
+import sys
+import json
+import queue
+import atexit
+import threading
+from datetime import datetime, timezone
 
-LOG_FILE=f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.log"
-logs_path=os.path.join(os.getcwd(),"logs",LOG_FILE)
-os.makedirs(logs_path,exist_ok=True)
+# JSON lines go to stderr, collected once for all workers by gunicorn or the
+# supervisor. LOG_FILE appends to one shared file instead; rotate it
+# externally (logrotate), since workers rotating it themselves lose records.
+LOG_FILE_PATH = os.getenv('LOG_FILE')
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
 
-LOG_FILE_PATH=os.path.join(logs_path,LOG_FILE)
+# Keep 1 in N verbose records per route, e.g. LOG_SAMPLE_RATES="ml_api=100,course_api=50"
+LOG_SAMPLE_RATE = int(os.getenv('LOG_SAMPLE_RATE', '1'))
+LOG_SAMPLE_RATES = {
+    key.strip(): int(value)
+    for key, value in (item.split('=', 1) for item in os.getenv('LOG_SAMPLE_RATES', '').split(',') if '=' in item)
+}
 
-logging.basicConfig(
-    filename=LOG_FILE_PATH,
-    format="[ %(asctime)s ] %(lineno)d %(name)s - %(levelname)s - %(message)s",
-    level=logging.INFO,
-)
\ No newline at end of file
+_RESERVED_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'sample'}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Render each record as one JSON object per line, including `extra` fields.
+    """
+    def format(self, record):
+        payload = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'pid': record.process,
+            'module': record.module,
+            'line': record.lineno,
+            'msg': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS:
+                payload[key] = value
+        if record.exc_info:
+            payload['exc'] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep 1 in N records tagged with extra={'sample': <route>}; never drops warnings or errors.
+    """
+    def __init__(self, default_rate=LOG_SAMPLE_RATE, rates=None):
+        super().__init__()
+        self.default_rate = default_rate
+        self.rates = rates if rates is not None else LOG_SAMPLE_RATES
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = getattr(record, 'sample', None)
+        if key is None or record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(key, self.default_rate)
+        if rate <= 1:
+            return True
+        with self._lock:
+            count = self._counts.get(key, 0)
+            self._counts[key] = count + 1
+        return count % rate == 0
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueue records without formatting them; the listener thread formats and writes.
+    """
+    def prepare(self, record):
+        return record
+
+
+def create_async_handler(log_file_path=LOG_FILE_PATH):
+    """
+    Build a queue handler and the listener that writes JSON lines to stderr or log_file_path.
+    """
+    if log_file_path:
+        dir_path = os.path.dirname(log_file_path)
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+        # Reopens the file when logrotate moves it
+        output_handler = logging.handlers.WatchedFileHandler(log_file_path, encoding='utf-8', delay=True)
+    else:
+        output_handler = logging.StreamHandler(sys.stderr)
+    output_handler.setFormatter(JsonFormatter())
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = LazyQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter())
+    listener = logging.handlers.QueueListener(log_queue, output_handler, respect_handler_level=True)
+    return queue_handler, listener
+
+
+def _install_handler():
+    global queue_handler, listener
+    queue_handler, listener = create_async_handler()
+    logging.root.addHandler(queue_handler)
+    listener.start()
+
+
+def reinstall_after_fork():
+    """
+    Start a new listener in a forked web worker; the parent's thread does not survive the fork.
+
+    Called from gunicorn's post_fork hook. Other forks, such as shard
+    workers, do not log and keep the inherited handler.
+    """
+    logging.root.removeHandler(queue_handler)
+    _install_handler()
+
+
+def _stop_listener():
+    listener.stop()
+
+
+logging.root.setLevel(LOG_LEVEL)
+_install_handler()
+atexit.register(_stop_listener)
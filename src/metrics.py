@@ -0,0 +1,59 @@
+import threading
+
+
+class Metrics:
+    def __init__(self):
+        """
+        Thread-safe in-process counters and gauges, exported as Prometheus text.
+        """
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def add_gauge(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + value
+
+    def snapshot(self):
+        """
+        Return a copy of all counters and gauges keyed by (name, labels).
+        """
+        with self._lock:
+            return dict(self._counters), dict(self._gauges)
+
+    def render(self):
+        """
+        Render all metrics in the Prometheus text exposition format.
+        """
+        counters, gauges = self.snapshot()
+        lines = []
+        for kind, values in (('counter', counters), ('gauge', gauges)):
+            seen = set()
+            for (name, labels), value in sorted(values.items(), key=lambda kv: (kv[0][0], str(kv[0][1]))):
+                if name not in seen:
+                    lines.append(f"# TYPE {name} {kind}")
+                    seen.add(name)
+                if labels:
+                    label_str = ','.join(f'{k}="{v}"' for k, v in labels)
+                    lines.append(f"{name}{{{label_str}}} {value}")
+                else:
+                    lines.append(f"{name} {value}")
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
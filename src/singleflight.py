@@ -0,0 +1,69 @@
+import copy
+import threading
+
+from src.metrics import metrics
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+def _detached(error):
+    """
+    Copy an exception without its traceback, or return it as is if it cannot be copied.
+    """
+    try:
+        return copy.copy(error).with_traceback(None)
+    except Exception:
+        return error
+
+
+class SingleFlight:
+    def __init__(self, name):
+        """
+        Coalesce concurrent calls with the same key into one execution.
+
+        The first caller for a key runs the function; callers arriving while it
+        is still running wait for it and receive the same result. On failure
+        each follower raises its own copy of the leader's exception, so threads
+        never share one traceback and the leader's frames are not kept alive.
+        """
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.followers += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            metrics.inc('singleflight_calls_total', group=self.name, role='follower')
+            call.done.wait()
+            if call.error is not None:
+                raise _detached(call.error)
+            return call.result
+
+        metrics.inc('singleflight_calls_total', group=self.name, role='leader')
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = _detached(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            if call.followers:
+                metrics.inc('singleflight_coalesced_total', call.followers, group=self.name)
+            call.done.set()
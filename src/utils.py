@@ -1,6 +1,7 @@
 import os
 import sys
 import pandas as pd
+from functools import lru_cache
 
 # import dill
 import pickle
@@ -56,5 +57,9 @@ def load_object(file_path):
 
 lemmatizer = WordNetLemmatizer()
 
+@lru_cache(maxsize=100000)
+def lemmatize_word(word):
+    return lemmatizer.lemmatize(word)
+
 def lemmatize_text(text):
-    return ' '.join([lemmatizer.lemmatize(word) for word in text.split()])
+    return ' '.join([lemmatize_word(word) for word in text.split()])
@@ -0,0 +1,95 @@
+import time
+import threading
+
+from src.admission import AdmissionController, PRIORITY_CHEAP, PRIORITY_COLD
+
+
+def wait_for_queue(controller, depth, timeout=2):
+    deadline = time.monotonic() + timeout
+    while len(controller._waiting) < depth:
+        assert time.monotonic() < deadline, "waiters never queued"
+        time.sleep(0.001)
+
+
+def test_admits_up_to_max_in_flight_without_queueing():
+    controller = AdmissionController(max_in_flight=2, max_queue=0, queue_timeout=1)
+    assert controller.acquire() is None
+    assert controller.acquire() is None
+    assert controller.acquire() == 'queue_full'
+
+    controller.release()
+    assert controller.acquire() is None
+
+
+def test_sheds_when_the_queue_is_full():
+    controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=1)
+    assert controller.acquire() is None
+    waiter = threading.Thread(target=controller.acquire)
+    waiter.start()
+    wait_for_queue(controller, 1)
+
+    started = time.monotonic()
+    assert controller.acquire() == 'queue_full'
+    assert time.monotonic() - started < 0.5
+
+    controller.release()
+    waiter.join()
+
+
+def test_queued_request_is_shed_at_the_deadline():
+    controller = AdmissionController(max_in_flight=1, max_queue=4, queue_timeout=0.05)
+    assert controller.acquire() is None
+
+    started = time.monotonic()
+    assert controller.acquire() == 'deadline'
+    assert time.monotonic() - started >= 0.05
+    # A shed request leaves the queue, so the next one is admitted straight away
+    assert controller._waiting == []
+    controller.release()
+    assert controller.acquire() is None
+
+
+def test_cheap_requests_are_dequeued_before_cold_ones():
+    controller = AdmissionController(max_in_flight=1, max_queue=4, queue_timeout=2)
+    assert controller.acquire() is None
+    admitted = []
+
+    def request(name, priority):
+        assert controller.acquire(priority) is None
+        admitted.append(name)
+        controller.release()
+
+    cold = threading.Thread(target=request, args=('cold', PRIORITY_COLD))
+    cold.start()
+    wait_for_queue(controller, 1)
+    cheap = threading.Thread(target=request, args=('cheap', PRIORITY_CHEAP))
+    cheap.start()
+    wait_for_queue(controller, 2)
+
+    controller.release()
+    cold.join()
+    cheap.join()
+    assert admitted == ['cheap', 'cold']
+
+
+def test_requests_of_equal_priority_are_admitted_in_arrival_order():
+    controller = AdmissionController(max_in_flight=1, max_queue=4, queue_timeout=2)
+    assert controller.acquire() is None
+    admitted = []
+
+    def request(name):
+        assert controller.acquire(PRIORITY_COLD) is None
+        admitted.append(name)
+        controller.release()
+
+    threads = []
+    for depth, name in enumerate(('first', 'second', 'third'), start=1):
+        thread = threading.Thread(target=request, args=(name,))
+        thread.start()
+        wait_for_queue(controller, depth)
+        threads.append(thread)
+
+    controller.release()
+    for thread in threads:
+        thread.join()
+    assert admitted == ['first', 'second', 'third']
@@ -0,0 +1,94 @@
+import time
+import threading
+import traceback
+
+from src.singleflight import SingleFlight
+
+
+class LookupFailed(Exception):
+    pass
+
+
+def run_coalesced(flight, fn, followers):
+    """
+    Start a leader blocked in fn plus `followers` callers for the same key, then let fn finish.
+
+    Returns what each caller got, leader first: ('ok', result) or ('error', exception).
+    """
+    release = threading.Event()
+    outcomes = [None] * (followers + 1)
+
+    def blocked():
+        release.wait(2)
+        return fn()
+
+    def call(slot):
+        try:
+            outcomes[slot] = ('ok', flight.do('alice', blocked))
+        except Exception as e:
+            outcomes[slot] = ('error', e)
+
+    threads = [threading.Thread(target=call, args=(0,))]
+    threads[0].start()
+    while 'alice' not in flight._calls:
+        time.sleep(0.001)
+    for slot in range(1, followers + 1):
+        threads.append(threading.Thread(target=call, args=(slot,)))
+        threads[-1].start()
+    deadline = time.monotonic() + 2
+    while flight._calls['alice'].followers < followers:
+        assert time.monotonic() < deadline, "followers never joined"
+        time.sleep(0.001)
+
+    release.set()
+    for thread in threads:
+        thread.join()
+    return outcomes
+
+
+def test_followers_share_the_leaders_result():
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return {'user': 'alice'}
+
+    outcomes = run_coalesced(SingleFlight('test'), fetch, followers=3)
+    assert len(calls) == 1
+    assert [outcome for outcome, _ in outcomes] == ['ok'] * 4
+    assert all(result is outcomes[0][1] for _, result in outcomes)
+
+
+def test_each_follower_raises_its_own_copy_of_the_error():
+    def fetch():
+        raise LookupFailed('alice', 'connection reset')
+
+    outcomes = run_coalesced(SingleFlight('test'), fetch, followers=3)
+    errors = [error for outcome, error in outcomes]
+    assert [outcome for outcome, _ in outcomes] == ['error'] * 4
+    assert all(type(error) is LookupFailed for error in errors)
+    assert all(error.args == ('alice', 'connection reset') for error in errors)
+    # Distinct instances, so concurrent raises never share one traceback
+    assert len({id(error) for error in errors}) == len(errors)
+
+    # Followers only carry their own frames, not the leader's call into fetch
+    for error in errors[1:]:
+        frames = [frame.name for frame in traceback.extract_tb(error.__traceback__)]
+        assert 'fetch' not in frames
+        assert 'blocked' not in frames
+    leader_frames = [frame.name for frame in traceback.extract_tb(errors[0].__traceback__)]
+    assert 'fetch' in leader_frames
+
+
+def test_key_is_released_after_a_failure():
+    flight = SingleFlight('test')
+
+    def fail():
+        raise LookupFailed('alice')
+
+    try:
+        flight.do('alice', fail)
+    except LookupFailed:
+        pass
+    assert flight._calls == {}
+    assert flight.do('alice', lambda: 'recovered') == 'recovered'
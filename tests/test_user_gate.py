@@ -0,0 +1,113 @@
+import sys
+
+import pytest
+
+from src.components import user_gate
+from src.components.user_gate import NegativeCache, UserGate
+from src.exception import DatabaseError, ProfileNotFoundError, UserNotFoundError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(user_gate, 'time', fake)
+    return fake
+
+
+def test_cached_error_is_a_new_instance_per_hit(clock):
+    cache = NegativeCache(ttl=30)
+    cache.put('bot1', UserNotFoundError('bot1'))
+
+    first, second = cache.get('bot1'), cache.get('bot1')
+    assert type(first) is UserNotFoundError
+    assert first.args == ('bot1',)
+    assert first is not second
+
+
+def test_entry_expires_after_ttl(clock):
+    cache = NegativeCache(ttl=30)
+    cache.put('bot1', UserNotFoundError('bot1'))
+
+    clock.now += 29
+    assert cache.get('bot1') is not None
+    clock.now += 2
+    assert cache.get('bot1') is None
+
+
+def test_repeat_failures_do_not_extend_the_ttl(clock):
+    cache = NegativeCache(ttl=30)
+    cache.put('bot1', UserNotFoundError('bot1'))
+
+    # A client polling every 10 seconds keeps failing while cached
+    for _ in range(2):
+        clock.now += 10
+        cache.put('bot1', UserNotFoundError('bot1'))
+
+    clock.now += 11
+    assert cache.get('bot1') is None
+
+
+def test_put_after_expiry_starts_a_new_ttl(clock):
+    cache = NegativeCache(ttl=30)
+    cache.put('bot1', UserNotFoundError('bot1'))
+
+    clock.now += 31
+    cache.put('bot1', ProfileNotFoundError('bot1'))
+    clock.now += 29
+    assert type(cache.get('bot1')) is ProfileNotFoundError
+
+
+def test_oldest_entries_are_evicted(clock):
+    cache = NegativeCache(ttl=30, max_entries=2)
+    for username in ('a', 'b', 'c'):
+        cache.put(username, UserNotFoundError(username))
+
+    assert cache.get('a') is None
+    assert cache.get('b') is not None
+    assert cache.get('c') is not None
+
+
+def test_discard_many_drops_only_the_given_usernames(clock):
+    cache = NegativeCache(ttl=30)
+    for username in ('a', 'b', 'c'):
+        cache.put(username, ProfileNotFoundError(username))
+
+    assert cache.discard_many({'a': 'hash', 'c': 'hash', 'd': 'hash'}) == 2
+    assert cache.get('a') is None
+    assert cache.get('b') is not None
+    assert cache.get('c') is None
+
+
+def test_gate_filters_unknown_users_without_extending_the_ttl(clock):
+    gate = UserGate(negative_ttl=30, refresh_interval=60)
+    gate._profile_hashes = {'alice': 'hash'}
+
+    gate.check('alice')
+    with pytest.raises(ProfileNotFoundError):
+        gate.check('bot1')
+
+    # Later probes are answered from the negative cache and keep the first expiry
+    clock.now += 20
+    with pytest.raises(ProfileNotFoundError):
+        gate.check('bot1')
+    clock.now += 11
+    assert gate.negative_cache.get('bot1') is None
+
+
+def test_remember_only_caches_errors_about_the_user(clock):
+    gate = UserGate(negative_ttl=30, refresh_interval=60)
+
+    gate.remember('alice', DatabaseError("connection refused", sys))
+    gate.check('alice')
+
+    gate.remember('bot1', UserNotFoundError('bot1'))
+    with pytest.raises(UserNotFoundError):
+        gate.check('bot1')